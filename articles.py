@@ -0,0 +1,78 @@
+import os
+import time
+
+import db
+from seen import canonical_url, signed_fingerprint, unsigned_fingerprint
+
+# Articles older than this are no longer offered to editions, and are purged
+ARTICLE_MAX_AGE_HOURS = float(os.getenv('ARTICLE_MAX_AGE_HOURS', '24'))
+ARTICLE_RETENTION_HOURS = float(os.getenv('ARTICLE_RETENTION_HOURS', '72'))
+
+INSERT_ARTICLE = '''
+INSERT OR IGNORE INTO articles (section, url, title, link, text, summary, fingerprint, ingested_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def init_articles():
+    """Create the article store: ingested articles with their extracted text and summary."""
+    with db.pool.connection() as conn:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            section TEXT NOT NULL,
+            url TEXT NOT NULL,
+            title TEXT NOT NULL,
+            link TEXT NOT NULL,
+            text TEXT,
+            summary TEXT NOT NULL,
+            fingerprint INTEGER,
+            ingested_at REAL NOT NULL,
+            UNIQUE (section, url)
+        )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_section ON articles (section, ingested_at)")
+
+
+def known_urls(section, links):
+    """Return the canonical URLs among `links` that the store already holds for `section`."""
+    urls = list({canonical_url(link) for link in links})
+    if not urls:
+        return set()
+    with db.pool.connection() as conn:
+        return {url for (url,) in conn.execute(
+            f"SELECT url FROM articles WHERE section = ? AND url IN ({', '.join('?' * len(urls))})",
+            [section, *urls]
+        )}
+
+
+def save_articles(section, articles, fingerprints=None):
+    """Store summarized articles of one ingestion pass and purge ones past retention.
+
+    `fingerprints` maps canonical URLs to SimHash fingerprints, as collected
+    by an ArticleDeduplicator.
+    """
+    fingerprints = fingerprints or {}
+    now = time.time()
+    rows = []
+    for article in articles:
+        url = canonical_url(article['link'])
+        fingerprint = fingerprints.get(url)
+        rows.append((section, url, article['title'], article['link'], article.get('text'), article['summary'],
+                     None if fingerprint is None else signed_fingerprint(fingerprint), now))
+    with db.pool.connection() as conn:
+        conn.executemany(INSERT_ARTICLE, rows)
+        conn.execute("DELETE FROM articles WHERE ingested_at < ?", (now - ARTICLE_RETENTION_HOURS * 3600,))
+
+
+def recent_articles(section, max_age_hours=ARTICLE_MAX_AGE_HOURS):
+    """Return the section's stored articles, newest ingestion pass first and page order within a pass."""
+    with db.pool.connection() as conn:
+        rows = conn.execute(
+            "SELECT title, link, summary, fingerprint FROM articles WHERE section = ? AND ingested_at >= ? "
+            "ORDER BY ingested_at DESC, id",
+            (section, time.time() - max_age_hours * 3600)
+        ).fetchall()
+    return [{'title': title, 'link': link, 'summary': summary,
+             'fingerprint': None if fingerprint is None else unsigned_fingerprint(fingerprint)}
+            for title, link, summary, fingerprint in rows]
@@ -1,23 +1,33 @@
 import os
-import sqlite3
 from flask import Flask, jsonify, request
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 import schedule
 import time
-import requests
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from threading import Thread
 import openai
 from dotenv import load_dotenv
 
+# Local modules read their settings from the environment when imported
+load_dotenv()
+
+from pipeline import process_articles
+from mailer import BulkMailer, request_refused
+from sources import fetch_sections, fallback_stats, section_limit
+from extract import extract_article_text, extractor_settings
+from http_client import session as http_session
+from fetch_cache import FetchCache
+from metadata import SUMMARY_METADATA, metadata_summary, tier_stats
+from summarizer import SUMMARY_API_ERROR, summary_cache, summarize_article_text, summarize_texts, get_batch_stats
+from newsletter_template import assemble_newsletter, render_section
+from segments import SECTION_TITLES, segment_titles
+from db import init_db, add_subscribers, get_subscriber_segments, subscribe_coalescer
+from jobs import JobRunner, init_jobs, enqueue_job, get_job, update_payload
+from editions import init_editions, save_edition, get_edition, find_edition, current_cycle
+from delivery import init_deliveries, iter_pending_recipients, record_results, delivery_counts
+from seen import ArticleDeduplicator, canonical_url, init_seen
+from articles import init_articles, known_urls, save_articles, recent_articles
+from ingest import IngestDaemon
+
 load_dotenv()
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 openai.api_key = OPENAI_API_KEY
@@ -29,147 +39,25 @@ app = Flask(__name__)
 
 SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY')
 SENDER_EMAIL = os.getenv('SENDER_EMAIL')
+mailer = BulkMailer(SENDGRID_API_KEY, SENDER_EMAIL, session=http_session)
 
-DATABASE = 'subscribers.db'
+fetch_cache = FetchCache()
+# Articles whose listing dek or <head> description is long enough skip the full fetch and the LLM
+describe_article = metadata_summary if SUMMARY_METADATA else None
 
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-
-def initialize_driver():
-    """Initialize and return a Chrome WebDriver."""
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    
-    service = Service(ChromeDriverManager().install())  # Service needs to be imported
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
-
-
-def init_db():
-    """Initialize the database and create the subscribers table if it doesn't exist."""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS subscribers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        email TEXT UNIQUE NOT NULL
-    )
-    ''')
-    conn.commit()
-    conn.close()
-
-def add_subscriber(email):
-    """Add a new subscriber to the database."""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("INSERT INTO subscribers (email) VALUES (?)", (email,))
-        conn.commit()
-    except sqlite3.IntegrityError:
-        pass  # Email already exists in the database
-    conn.close()
-    
-def get_subscribers():
-    """Retrieve all subscribed emails from the database."""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT email FROM subscribers")
-    subscribers = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return subscribers
-
-def initialize_driver():
-    """Initialize and return a Chrome WebDriver."""
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
-
-def get_finance_news(driver):
-    """Scrape finance news from CNBC with improved selectors."""
-    try:
-        print("Navigating to the finance news page...")
-        driver.get('https://www.cnbc.com/finance/')
-
-        # Use more specific selectors to target actual news articles
-        wait = WebDriverWait(driver, 10)
-        print("Waiting for news elements...")
-        
-        # Target headline articles with more specific selector
-        news_elements = wait.until(EC.presence_of_all_elements_located(
-            (By.CSS_SELECTOR, 'div.Card-titleContainer a')
-        ))
-        
-        print("Extracting news...")
-        news = []
-        
-        for element in news_elements[:5]:  # Limit to 5 articles
-            title = element.text.strip()
-            link = element.get_attribute('href')
-            
-            if title and link and not link.endswith('#comments'):
-                # Get summary from article
-                article_summary = get_article_summary(link)
-                news.append({'title': title, 'summary': article_summary, 'link': link})
-                
-                if len(news) >= 5:
-                    break
-                    
-        return news
-    except Exception as e:
-        print(f"Error scraping CNBC Finance: {e}")
-        return []
+SUBSCRIBE_BULK_MAX = int(os.getenv('SUBSCRIBE_BULK_MAX', '10000'))
 
-def get_article_summary(article_url):
-    """Fetch article content and summarize it using GPT-4o Mini."""
+def fetch_article_text(article_url):
+    """Fetch an article page and return its main story text, or None on error."""
     try:
         print(f"Fetching article from: {article_url}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(article_url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Extract all paragraphs to get more content
-        paragraphs = soup.find_all('p')
-        article_text = ' '.join([p.get_text().strip() for p in paragraphs[:10]])  # Limit to first 10 paragraphs
-        
-        if not article_text:
-            return "Summary not available - couldn't extract article content."
-            
-        # Use GPT-4o Mini to summarize
-        return summarize_with_gpt4o_mini(article_text)
+        # Unchanged pages are revalidated with a conditional GET and served from
+        # the cache; changed ones are streamed into the extractor, which stops
+        # reading once it has enough story text for the summarizer's token budget
+        return fetch_cache.fetch_text(article_url, extract_article_text, extractor_settings())
     except Exception as e:
-        print(f"Error fetching or summarizing article from {article_url}: {e}")
-        return "Summary not available due to technical error."
-
-def summarize_with_gpt4o_mini(article_text):
-    """Use GPT-4o Mini to generate a concise summary of an article."""
-    try:
-        if not article_text or len(article_text) < 50:
-            return "Summary not available due to insufficient content."
-            
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that summarizes news articles concisely in 2-3 sentences."},
-                {"role": "user", "content": f"Summarize this article in 2-3 sentences:\n\n{article_text}"}
-            ],
-            max_tokens=150
-        )
-        
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"Error using GPT-4o Mini for summarization: {e}")
-        return "Summary not available due to API error."
+        print(f"Error fetching article from {article_url}: {e}")
+        return None
 
 def summarize_with_gpt4(text):
     try:
@@ -186,154 +74,299 @@ def summarize_with_gpt4(text):
         print(f"Error summarizing with GPT-4: {e}")
         return "Summary not available"
     
-def get_tech_news(driver):
-    """Scrape tech news from The Verge with improved selectors."""
-    try:
-        print("Navigating to the tech news page...")
-        # Use the dedicated tech section instead of homepage
-        driver.get('https://www.theverge.com/tech')
-        
-        wait = WebDriverWait(driver, 10)
-        print("Waiting for tech news elements...")
-        
-        # Target main article headlines with specific selector
-        news_elements = wait.until(EC.presence_of_all_elements_located(
-            (By.CSS_SELECTOR, 'h2 a')  # More general selector
-        ))
-        
-        print("Extracting tech news...")
-        news = []
-        
-        for element in news_elements:
-            title = element.text.strip()
-            link = element.get_attribute('href')
-            
-            if title and link and 'theverge.com' in link and not link.endswith('#comments'):
-                article_summary = get_article_summary(link)
-                news.append({'title': title, 'summary': article_summary, 'link': link})
-                
-                if len(news) >= 5:
-                    break
-        
-        print(f"Found {len(news)} tech news articles.")
-        return news
-    except Exception as e:
-        print(f"Error scraping The Verge: {e}")
-        return []
-
-
-def send_email(subject, content, to_email):
-    """Send an email using SendGrid with better error handling."""
-    if not SENDGRID_API_KEY or not SENDER_EMAIL:
-        print("SendGrid API key or sender email not configured.")
-        return False
-
-    message = Mail(
-        from_email=SENDER_EMAIL,
-        to_emails=to_email,
-        subject=subject,
-        html_content=content
-    )
-
-    try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(message)
-        print(f"Email sent to {to_email}. Status code: {response.status_code}")
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        if hasattr(e, 'body'):
-            print(f"SendGrid error details: {e.body}")
-        return False
-
 @app.route('/subscribe', methods=['POST'])
 def subscribe():
     """Handle subscription by adding an email to the database."""
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     email = data.get('email')
+    preference = data.get('preference') or ''
 
-    if not email:
+    if not isinstance(email, str) or not email.strip():
         return jsonify({"error": "Email is required"}), 400
+    if not isinstance(preference, str):
+        return jsonify({"error": "Preference must be a string"}), 400
+    # Stored the same way /subscribe/bulk stores it, so duplicates are caught across both
+    email = email.strip()
+
+    # Add the email to the database, sharing a transaction with concurrent subscribes
+    inserted = subscribe_coalescer.add(email, preference)
+
+    return jsonify({"message": f"Subscribed successfully with email: {email}",
+                    "status": "subscribed" if inserted else "duplicate"}), 200
+
+@app.route('/subscribe/bulk', methods=['POST'])
+def subscribe_bulk():
+    """Subscribe a list of emails in a single transaction and report the outcome per email."""
+    data = request.get_json(silent=True) or {}
+    emails = data.get('emails')
+    preference = data.get('preference') or ''
+
+    if not isinstance(emails, list) or not emails:
+        return jsonify({"error": "A non-empty list of emails is required"}), 400
+    if not isinstance(preference, str):
+        return jsonify({"error": "Preference must be a string"}), 400
+    if len(emails) > SUBSCRIBE_BULK_MAX:
+        return jsonify({"error": f"At most {SUBSCRIBE_BULK_MAX} emails per request"}), 413
+
+    valid = [email for email in emails if isinstance(email, str) and email.strip()]
+    inserted = iter(add_subscribers([(email.strip(), preference) for email in valid]))
+
+    results = []
+    for email in emails:
+        if isinstance(email, str) and email.strip():
+            status = "subscribed" if next(inserted) else "duplicate"
+        else:
+            status = "invalid"
+        results.append({"email": email, "status": status})
+
+    return jsonify({
+        "subscribed": sum(1 for result in results if result['status'] == "subscribed"),
+        "duplicates": sum(1 for result in results if result['status'] == "duplicate"),
+        "invalid": sum(1 for result in results if result['status'] == "invalid"),
+        "results": results,
+    }), 200
+
+def build_edition(sections, progress):
+    """Scrape, summarize and render the given sections, and store them as a new edition."""
+    # Collect headlines from every source of every section at once; a listing
+    # only borrows a pooled browser when it can't be read from the static HTML
+    progress.set('stage', 'scraping')
+    links = fetch_sections(sections)
+    print(f"Browser fallbacks per source: {fallback_stats()}")
+    progress.set('articles_found', sum(len(items) for items in links.values()))
+
+    # Leave out stories an earlier edition already covered, and stories
+    # repeated across sections, before spending requests on them
+    deduplicator = ArticleDeduplicator(current_cycle())
+    links = deduplicator.filter_links(links)
+
+    # Fetch and summarize every article from all sections at once
+    progress.set('stage', 'summarizing')
+    news = process_articles(links, fetch_article_text, summarize_article_text,
+                            on_article=lambda article: progress.increment('articles_summarized'),
+                            summarize_many=summarize_texts, skip=deduplicator.is_duplicate,
+                            describe=describe_article)
+    deduplicator.record([article for articles in news.values() for article in articles])
+    progress.set('articles_skipped', sum(deduplicator.skipped.values()))
+    print(f"Skipped already covered or duplicate articles: {deduplicator.skipped}")
+    print(f"Summary sources (dek, head metadata, full page): {tier_stats()}")
+    print(f"Fetch cache: {fetch_cache.stats()}")
+    print(f"Summary cache: {summary_cache.stats()}")
+    print(f"Summary batching: {get_batch_stats()}")
+
+    return store_edition(sections, news)
+
+def store_edition(sections, news):
+    """Render each section of `news` and save them as a new edition."""
+    # Each section is rendered once here and reused by every segment and every re-send
+    edition_id = save_edition({
+        key: {'title': SECTION_TITLES[key], 'articles': news[key],
+              'html': render_section(SECTION_TITLES[key], news[key])}
+        for key in sections
+    })
+    print(f"Built newsletter edition {edition_id}.")
+    return get_edition(edition_id)
+
+def ingest_articles():
+    """Ingestion pass: fetch, summarize and store every section's articles the store doesn't hold yet."""
+    sections = list(SECTION_TITLES)
+    links = fetch_sections(sections)
+    for key, items in links.items():
+        known = known_urls(key, [article['link'] for article in items])
+        links[key] = [article for article in items if canonical_url(article['link']) not in known]
+    deduplicator = ArticleDeduplicator(current_cycle())
+    links = deduplicator.filter_links(links)
+
+    texts = {}
+    def skip(article, article_text):
+        if deduplicator.is_duplicate(article, article_text):
+            return True
+        texts[article['link']] = article_text
+        # Pages that couldn't be fetched are left for the next pass
+        return not article_text
+
+    news = process_articles(links, fetch_article_text, summarize_article_text,
+                            summarize_many=summarize_texts, skip=skip, describe=describe_article)
+    stored = {}
+    for key, articles in news.items():
+        # Like pages that couldn't be fetched, summaries the API failed on are left for the next pass
+        articles = [article for article in articles if article['summary'] != SUMMARY_API_ERROR]
+        save_articles(key, [dict(article, text=texts.get(article['link'])) for article in articles],
+                      deduplicator.fingerprints)
+        stored[key] = len(articles)
+    return {'stored': stored, 'skipped': deduplicator.skipped}
+
+ingest_daemon = IngestDaemon(ingest_articles)
+
+def build_edition_from_store(sections, progress):
+    """Assemble an edition from already summarized stored articles, or return None if a section has none."""
+    progress.set('stage', 'assembling')
+    stored = {key: recent_articles(key) for key in sections}
+    if not all(stored.values()):
+        return None
+
+    # Same coverage rules as a live build, applied to the stored fingerprints
+    deduplicator = ArticleDeduplicator(current_cycle())
+    candidates = deduplicator.filter_links(stored)
+    news = {}
+    for key in sections:
+        limit = section_limit(key)
+        news[key] = []
+        for article in candidates[key]:
+            if len(news[key]) >= limit:
+                break
+            if not deduplicator.is_near_duplicate(article, article.pop('fingerprint')):
+                news[key].append(article)
+    deduplicator.record([article for articles in news.values() for article in articles])
+    progress.set('articles_found', sum(len(articles) for articles in news.values()))
+    return store_edition(sections, news)
+
+def get_or_build_edition(sections, progress, edition_id=None, rebuild=False):
+    """Return the requested edition, today's edition covering `sections`, or a new one.
+
+    New editions come from the article store kept warm by the ingestion
+    daemon, which takes milliseconds; without the daemon, or when a section
+    has nothing stored, the sections are scraped and summarized live.
+    """
+    if edition_id is not None:
+        edition = get_edition(edition_id)
+        if edition is None:
+            raise ValueError(f"Edition {edition_id} not found.")
+        missing = [key for key in sections if key not in edition['sections']]
+        if missing:
+            raise ValueError(f"Edition {edition_id} has no {', '.join(missing)} section.")
+        return edition
+    if not rebuild:
+        edition = find_edition(sections)
+        if edition is not None:
+            print(f"Reusing newsletter edition {edition['id']} built at {time.ctime(edition['built_at'])}.")
+            return edition
+    if ingest_daemon.enabled:
+        edition = build_edition_from_store(sections, progress)
+        if edition is not None:
+            return edition
+        print("The article store has nothing recent for some sections, building the edition live.")
+    return build_edition(sections, progress)
+
+def build_and_send_newsletter(payload, progress):
+    """Job handler: send each subscriber segment the sections it asked for from a stored edition."""
+    segments = get_subscriber_segments()
+
+    if not segments:
+        return {"message": "No subscribers found."}
 
-    # Add the email to the database
-    add_subscriber(email)
-
-    return jsonify({"message": f"Subscribed successfully with email: {email}"}), 200
-
-@app.route('/send_newsletter', methods=['GET'])
-def send_newsletter():
-    """Fetch news and send a newsletter to all subscribers."""
-    driver = initialize_driver()
-
-    # Fetch finance news and tech news
-    finance_news = get_finance_news(driver)
-    tech_news = get_tech_news(driver)
-    
-    # Close the driver after use
-    driver.quit()
-
-    content = "<h1>Today's Finance & Tech News</h1>"
-    
-    # Finance News Section
-    content += "<h2>Finance News</h2><ul>"
-    if not finance_news:
-        content += "<p>No Finance news available today.</p>"
-    else:
-        for item in finance_news:
-            content += f"<li><strong>{item['title']}</strong>"
-            if item['summary'] and item['summary'] != "Summary not available":
-                content += f"<p>{item['summary']}</p>"
-            content += f"<a href='{item['link']}'>Read more</a></li>"
-    content += "</ul>"
-    
-    # Tech News Section
-    content += "<h2>Tech News</h2><ul>"
-    if not tech_news:
-        content += "<p>No Tech news available today.</p>"
-    else:
-        for item in tech_news:
-            content += f"<li><strong>{item['title']}</strong>"
-            if item['summary'] and item['summary'] != "Summary not available":
-                content += f"<p>{item['summary']}</p>"
-            content += f"<a href='{item['link']}'>Read more</a></li>"
-    content += "</ul>"
-
-    subscribers = get_subscribers()
-    
-    if not subscribers:
-        return jsonify({"message": "No subscribers found."}), 404
-
+    if not SENDGRID_API_KEY or not SENDER_EMAIL:
+        raise RuntimeError("SendGrid API key or sender email not configured.")
+
+    # Only sections that at least one subscriber wants are needed in the edition
+    needed = [key for key in SECTION_TITLES if any(key in sections for sections in segments)]
+    edition = get_or_build_edition(needed, progress, payload.get('edition_id'), payload.get('rebuild', False))
+    progress.set('edition_id', edition['id'])
+    # A restarted job must resume the same edition rather than build another one
+    update_payload(progress.job_id, edition_id=edition['id'], rebuild=False)
+
+    # Assemble one body per segment from the stored fragments; each recipient only differs by a
+    # few substituted tokens, and the whole segment goes out in batched SendGrid requests.
+    # Subscribers who still need this edition are streamed from the database page by page,
+    # and every sent batch is recorded in the delivery ledger so a restart resumes from there
+    progress.set('stage', 'delivering')
+    progress.set('already_delivered', delivery_counts(edition['id']).get('sent', 0))
     success_count = 0
-    for subscriber in subscribers:
-        if send_email("Daily Finance & Tech Newsletter", content, subscriber):
-            success_count += 1
-
-    if success_count > 0:
-        return jsonify({"message": f"Newsletter sent successfully to {success_count} subscribers!"}), 200
-    else:
-        return jsonify({"message": "Failed to send newsletters. Check SendGrid configuration."}), 500
+    total_count = 0
+    refused = None
+    for sections, preferences in segments.items():
+        title = segment_titles(sections)
+        newsletter = assemble_newsletter([edition['sections'][key]['html'] for key in sections],
+                                         heading=f"Today's {title} News")
+        recipients = iter_pending_recipients(edition['id'], preferences)
+        for results in mailer.iter_send_batches(f"Daily {title} Newsletter", newsletter.text, recipients,
+                                                substitutions=lambda email, newsletter=newsletter: newsletter.substitutions(email=email)):
+            record_results(edition['id'], results)
+            sent = sum(1 for result in results if result['ok'])
+            total_count += len(results)
+            success_count += sent
+            progress.increment('emails_sent', sent)
+            progress.increment('emails_failed', len(results) - sent)
+            refused = refused or next((result for result in results if request_refused(result)), None)
+        # The mailer stops once SendGrid refuses a request; the rest of the list stays queued
+        recipients.close()
+        if refused:
+            break
+    print(f"Newsletter delivered to {success_count} of {total_count} subscribers.")
+    progress.set('stage', 'finished')
+
+    if refused:
+        raise RuntimeError(f"SendGrid refused the request ({refused['status']}: {(refused['error'] or '')[:200]}). "
+                           "Check the API key and account; unsent subscribers stay queued for the next send.")
+    if total_count == 0:
+        return {"message": "Every subscriber has already received this edition.",
+                "edition_id": edition['id'], "sent": 0, "failed": 0}
+    if success_count == 0:
+        raise RuntimeError("Failed to send newsletters. Check SendGrid configuration.")
+    return {"message": f"Newsletter sent successfully to {success_count} subscribers!",
+            "edition_id": edition['id'], "sent": success_count, "failed": total_count - success_count}
+
+job_runner = JobRunner({'send_newsletter': build_and_send_newsletter})
+
+def enqueue_newsletter(edition_id=None, rebuild=False):
+    """Queue a newsletter send job and make sure a worker will pick it up."""
+    payload = {'rebuild': rebuild}
+    if edition_id is not None:
+        payload['edition_id'] = edition_id
+    job_id = enqueue_job('send_newsletter', payload)
+    job_runner.start()
+    job_runner.wake()
+    print(f"Queued newsletter job {job_id}.")
+    return job_id
+
+@app.route('/send_newsletter', methods=['GET', 'POST'])
+def send_newsletter():
+    """Queue a newsletter send and return the job id straight away.
+
+    Sends reuse today's stored edition when there is one; pass `edition_id` to
+    re-send a specific edition or `rebuild=1` to build a new one from the
+    article store (or by scraping, when the store is empty).
+    """
+    edition_id = request.args.get('edition_id', type=int)
+    rebuild = request.args.get('rebuild', '').lower() in ('1', 'true', 'yes')
+    job_id = enqueue_newsletter(edition_id, rebuild)
+    return jsonify({"message": "Newsletter queued.", "job_id": job_id, "status_url": f"/jobs/{job_id}"}), 202
+
+@app.route('/jobs/<int:job_id>', methods=['GET'])
+def job_status(job_id):
+    """Report a job's status and progress counters."""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
 
 def run_scheduler():
     """Run the scheduler to send newsletters at scheduled times."""
-    schedule.every().day.at("21:47").do(send_newsletter)  # Schedule at 8 AM daily
+    schedule.every().day.at("21:47").do(enqueue_newsletter)  # Schedule at 8 AM daily
 
     while True:
         schedule.run_pending()
         time.sleep(60)  # Check every minute
 
-# Start the scheduler in a separate thread
-scheduler_thread = Thread(target=run_scheduler, daemon=True)
-scheduler_thread.start()
-
-
-# Start the scheduler in a separate thread
+# Register the second daily send with the scheduler thread that is already running;
+# a second run_scheduler loop would fire every pending job twice
 def start_background_scheduler():
-    # Schedule to run daily at specific time
-    schedule.every().day.at("21:53").do(lambda: requests.get('http://127.0.0.1:5000/send_newsletter'))
-    thread = Thread(target=run_scheduler, daemon=True)
-    thread.start()
+    # Schedule to run daily at specific time; queuing returns immediately
+    schedule.every().day.at("21:53").do(enqueue_newsletter)
 
 if __name__ == "__main__":
     init_db()  # Ensure database is initialized
-    start_background_scheduler()
+    init_jobs()
+    init_editions()
+    init_deliveries()
+    init_seen()
+    init_articles()
+    # With the debug reloader on, this module also runs in the watcher process;
+    # only the serving child (WERKZEUG_RUN_MAIN) may run workers and the scheduler
+    if os.getenv('WERKZEUG_RUN_MAIN') == 'true':
+        job_runner.start()
+        ingest_daemon.start()
+        # Start the scheduler in a separate thread
+        Thread(target=run_scheduler, daemon=True).start()
+        start_background_scheduler()
     app.run(debug=True)
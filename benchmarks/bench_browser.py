@@ -0,0 +1,108 @@
+"""Benchmark: full versus lean headless Chrome on listing pages.
+
+For each page it reports the load time until the headline selector is
+present, the bytes transferred, and the resident memory of the Chrome
+processes (needs psutil). Needs Chrome. Bytes come from the Resource Timing
+API, which reports 0 for cross-origin responses without Timing-Allow-Origin,
+so they understate what the full profile downloads.
+
+By default it loads every registered listing source. Pass a directory of
+recorded listing pages and a selector to serve them locally instead:
+
+Usage: python benchmarks/bench_browser.py [--dir recorded_pages --selector "h2 a"] [repeats]
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser_pool import initialize_driver
+from sources import SECTION_SOURCES, ListingSource
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+TRANSFERRED_BYTES = '''
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+return entries.reduce((total, entry) => total + (entry.transferSize || 0), 0);
+'''
+
+
+def chrome_rss(driver):
+    """Resident memory of chromedriver's Chrome processes in bytes, or None without psutil."""
+    if psutil is None:
+        return None
+    process = psutil.Process(driver.service.process.pid)
+    total = 0
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+def load(driver, url, selector, lean):
+    driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+    start = time.perf_counter()
+    driver.get(url)
+    WebDriverWait(driver, 30).until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector)))
+    if lean:
+        driver.execute_script('window.stop();')
+    elapsed = time.perf_counter() - start
+    return elapsed, driver.execute_script(TRANSFERRED_BYTES), chrome_rss(driver)
+
+
+def serve(directory):
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    handler.log_message = lambda *args: None
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/"
+
+
+def pages_to_load(args):
+    if '--dir' in args:
+        directory = args[args.index('--dir') + 1]
+        selector = args[args.index('--selector') + 1]
+        base = serve(directory)
+        return [(name, base + name, selector) for name in sorted(os.listdir(directory)) if name.endswith('.html')]
+    return [(source.name, source.url, source.selector)
+            for sources in SECTION_SOURCES.values() for source in sources if isinstance(source, ListingSource)]
+
+
+def main():
+    args = sys.argv[1:]
+    repeats = int(args[-1]) if args and args[-1].isdigit() else 3
+    pages = pages_to_load(args)
+    if not pages:
+        sys.exit("no listing pages to load")
+
+    print(f"{'page':<28}{'profile':<8}{'load s':>8}{'KiB':>10}{'Chrome RSS MiB':>16}")
+    for lean in (False, True):
+        driver = initialize_driver(lean=lean)
+        try:
+            for name, url, selector in pages:
+                runs = [load(driver, url, selector, lean) for _ in range(repeats)]
+                elapsed = sum(run[0] for run in runs) / repeats
+                transferred = sum(run[1] for run in runs) / repeats
+                rss = max(run[2] for run in runs) if runs[0][2] is not None else None
+                rss_text = f"{rss / 2 ** 20:.0f}" if rss is not None else 'n/a'
+                print(f"{name[:27]:<28}{'lean' if lean else 'full':<8}{elapsed:>8.2f}"
+                      f"{transferred / 1024:>10.0f}{rss_text:>16}")
+        finally:
+            driver.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark: tokens per article sent to the summarizer, before and after content extraction.
+
+Runs over a saved corpus of article pages (one .html file per article) and
+compares the old first-10-paragraphs text with extract_article_text().
+Save a fresh corpus of the current headlines of every registered source with --fetch.
+
+Usage: python benchmarks/bench_extract.py [corpus_dir] [--fetch]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract import EXTRACT_TOKEN_BUDGET, estimate_tokens, extract_article_text, first_paragraphs
+from http_client import get_text
+from sources import SECTION_SOURCES
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def fetch_corpus(corpus_dir):
+    """Download the articles currently linked from every registered source."""
+    os.makedirs(corpus_dir, exist_ok=True)
+    sources = [source for section in SECTION_SOURCES.values() for source in section]
+    for source in sources:
+        prefix = ''.join(c if c.isalnum() else '-' for c in source.name.lower())
+        for index, article in enumerate(source.fetch_static()):
+            path = os.path.join(corpus_dir, f"{prefix}-{index}.html")
+            with open(path, 'w', encoding='utf-8') as page:
+                page.write(get_text(article['link']))
+            print(f"saved {article['link']} -> {path}")
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != '--fetch']
+    corpus_dir = args[0] if args else DEFAULT_CORPUS
+    if '--fetch' in sys.argv:
+        fetch_corpus(corpus_dir)
+
+    paths = sorted(os.path.join(corpus_dir, name) for name in os.listdir(corpus_dir) if name.endswith('.html'))
+    if not paths:
+        sys.exit(f"no .html pages in {corpus_dir}; run with --fetch to save some")
+
+    before_total = after_total = 0
+    extract_time = 0.0
+    print(f"{'page':<24}{'before':>8}{'after':>8}")
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as page:
+            html = page.read()
+        before = estimate_tokens(first_paragraphs(html))
+        start = time.perf_counter()
+        after = estimate_tokens(extract_article_text(html))
+        extract_time += time.perf_counter() - start
+        before_total += before
+        after_total += after
+        print(f"{os.path.basename(path):<24}{before:>8}{after:>8}")
+
+    print(f"pages:                  {len(paths)}")
+    print(f"token budget:           {EXTRACT_TOKEN_BUDGET}")
+    print(f"tokens/article before:  {before_total / len(paths):.0f}")
+    print(f"tokens/article after:   {after_total / len(paths):.0f}")
+    print(f"extraction per page:    {extract_time / len(paths) * 1e3:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark: parse time and peak memory per article page for each parser backend.
+
+Compares the old BeautifulSoup html.parser tree (first_paragraphs) with the
+streaming scanner and, when lxml is installed, the lxml target parser, over
+the saved corpus used by bench_extract.py (create it with
+`python benchmarks/bench_extract.py --fetch`).
+
+Peak memory is measured with tracemalloc, so it covers Python allocations
+only; memory allocated inside lxml's C code is not included.
+
+Usage: python benchmarks/bench_parse.py [corpus_dir] [repeats]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extract
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def backends():
+    candidates = {
+        'bs4 html.parser': extract.first_paragraphs,
+        'stream': lambda html: extract.extract_article_text(html, backend='stream'),
+    }
+    if extract.etree is not None:
+        candidates['lxml'] = lambda html: extract.extract_article_text(html, backend='lxml')
+    return candidates
+
+
+def main():
+    corpus_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CORPUS
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    pages = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith('.html'):
+            with open(os.path.join(corpus_dir, name), encoding='utf-8', errors='replace') as page:
+                pages.append(page.read())
+    if not pages:
+        sys.exit(f"no .html pages in {corpus_dir}; run bench_extract.py --fetch to save some")
+
+    print(f"pages: {len(pages)}, mean size: {sum(map(len, pages)) / len(pages) / 1024:.0f} KiB")
+    print(f"{'backend':<18}{'ms/page':>10}{'peak KiB/page':>16}")
+    for name, parse in backends().items():
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for html in pages:
+                parse(html)
+        elapsed = (time.perf_counter() - start) / (repeats * len(pages))
+
+        peak = 0
+        for html in pages:
+            tracemalloc.start()
+            parse(html)
+            peak += tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(f"{name:<18}{elapsed * 1e3:>10.2f}{peak / len(pages) / 1024:>16.0f}")
+
+
+if __name__ == '__main__':
+    main()
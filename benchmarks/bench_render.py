@@ -0,0 +1,51 @@
+"""Micro-benchmark: per-recipient cost of personalizing a pre-rendered newsletter.
+
+Usage: python benchmarks/bench_render.py [subscribers]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from newsletter_template import build_newsletter, render_section
+
+
+def sample_articles(section, count=5):
+    return [{
+        'title': f"{section} headline {i}",
+        'summary': f"A three sentence summary of {section.lower()} story {i}. " * 3,
+        'link': f"https://example.com/{section.lower()}/{i}",
+    } for i in range(count)]
+
+
+def main():
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sections = [('Finance', sample_articles('Finance')), ('Tech', sample_articles('Tech'))]
+    emails = [f"reader{i}@example.com" for i in range(subscribers)]
+
+    # Baseline: rebuild the whole body for every recipient
+    start = time.perf_counter()
+    for email in emails:
+        body = ''.join(render_section(title, items) for title, items in sections)
+        body += f"<p>{email}</p>"
+    naive = time.perf_counter() - start
+
+    start = time.perf_counter()
+    newsletter = build_newsletter(sections)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for email in emails:
+        newsletter.render(email=email)
+    templated = time.perf_counter() - start
+
+    print(f"subscribers:            {subscribers}")
+    print(f"body size:              {len(newsletter.text)} bytes")
+    print(f"one-time build:         {build * 1e6:.1f} us")
+    print(f"rebuild per recipient:  {naive / subscribers * 1e6:.2f} us")
+    print(f"template per recipient: {templated / subscribers * 1e6:.2f} us")
+
+
+if __name__ == '__main__':
+    main()
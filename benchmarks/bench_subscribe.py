@@ -0,0 +1,69 @@
+"""Benchmark: subscribes per second under N concurrent clients.
+
+Compares the old connect-per-call access pattern against the pooled WAL
+data-access layer in db.py, each on a fresh database in a temp directory.
+
+Usage: python benchmarks/bench_subscribe.py [clients] [subscribes_per_client]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+
+def connect_per_call(path):
+    def subscribe(email):
+        conn = sqlite3.connect(path, timeout=30)
+        try:
+            conn.execute(db.INSERT_SUBSCRIBER, (email, ''))
+            conn.commit()
+        except sqlite3.IntegrityError:
+            pass
+        conn.close()
+    return subscribe
+
+
+def run(label, subscribe, clients, per_client):
+    def client(n):
+        for i in range(per_client):
+            subscribe(f"client{n}-{i}@example.com")
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {clients * per_client / elapsed:10.0f} subscribes/s")
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    print(f"{clients} clients x {per_client} subscribes")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.pool = db.ConnectionPool(os.path.join(tmp, 'baseline.db'))
+        db.init_db()
+        db.pool.close()
+        # Reset the baseline file to the default rollback journal the old code used
+        conn = sqlite3.connect(os.path.join(tmp, 'baseline.db'))
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+        run('connect per call', connect_per_call(os.path.join(tmp, 'baseline.db')), clients, per_client)
+
+        db.pool = db.ConnectionPool(os.path.join(tmp, 'pooled.db'))
+        db.init_db()
+        run('pooled WAL', db.add_subscriber, clients, per_client)
+        db.pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', '2'))
+BROWSER_MAX_PAGES = int(os.getenv('BROWSER_MAX_PAGES', '50'))  # recycle a browser after this many leases
+BROWSER_LEASE_TIMEOUT = float(os.getenv('BROWSER_LEASE_TIMEOUT', '120'))
+# The lean profile skips images, media, fonts and the blocklisted third-party hosts,
+# and returns from page loads at DOMContentLoaded
+BROWSER_LEAN = os.getenv('BROWSER_LEAN', '1').lower() in ('1', 'true', 'yes')
+DEFAULT_BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*doubleclick.net*', '*googlesyndication.com*', '*googletagmanager.com*', '*google-analytics.com*',
+    '*amazon-adsystem.com*', '*adsafeprotected.com*', '*scorecardresearch.com*', '*chartbeat.*',
+    '*taboola.com*', '*outbrain.com*', '*facebook.net*', '*connect.facebook.*', '*twitter.com/widgets*',
+    '*cdn.permutive.com*', '*cdn.cookielaw.org*', '*krxd.net*', '*moatads.com*', '*criteo.*', '*pubmatic.com*',
+]
+# Comma-separated URL patterns (with * wildcards) that replace the default blocklist
+BROWSER_BLOCKED_URLS = [pattern.strip() for pattern in os.getenv('BROWSER_BLOCKED_URLS', '').split(',')
+                        if pattern.strip()] or DEFAULT_BLOCKED_URLS
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def get_driver_path():
+    """Resolve the chromedriver binary once per process instead of on every launch."""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+def initialize_driver(lean=BROWSER_LEAN):
+    """Initialize and return a Chrome WebDriver, with the lean profile unless `lean` is False."""
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    if lean:
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_argument('--mute-audio')
+        chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+
+    service = Service(get_driver_path())
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    if lean:
+        # Blocked requests fail before they leave the browser
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BROWSER_BLOCKED_URLS})
+    return driver
+
+
+class PooledDriver:
+    """A pooled WebDriver plus the number of pages it has served."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+
+
+class DriverPool:
+    """A size-bounded pool of long-lived headless Chrome drivers.
+
+    Callers borrow a driver with `lease()`. Drivers are health-checked before
+    they are handed out, and are quit and replaced once they have served
+    `max_pages` leases or fail while leased.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_pages=BROWSER_MAX_PAGES, factory=initialize_driver):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.factory = factory
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _is_healthy(self, pooled):
+        try:
+            pooled.driver.execute_script('return 1')
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            print(f"Error quitting browser: {e}")
+        with self._condition:
+            self._total -= 1
+            self._condition.notify()
+
+    def _acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                elif self._total < self.size:
+                    self._total += 1
+                    pooled = None
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a browser from the pool")
+                    self._condition.wait(remaining)
+                    continue
+
+            if pooled is None:
+                try:
+                    return PooledDriver(self.factory())
+                except Exception:
+                    with self._condition:
+                        self._total -= 1
+                        self._condition.notify()
+                    raise
+            if self._is_healthy(pooled):
+                return pooled
+            print("Discarding unhealthy browser from the pool.")
+            self._discard(pooled)
+
+    def _release(self, pooled, failed):
+        pooled.pages += 1
+        if failed or pooled.pages >= self.max_pages or self._closed:
+            self._discard(pooled)
+            return
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    @contextmanager
+    def lease(self, timeout=BROWSER_LEASE_TIMEOUT):
+        """Borrow a driver for the duration of the block."""
+        pooled = self._acquire(timeout)
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            self._release(pooled, failed=True)
+            raise
+        except BaseException:
+            self._release(pooled, failed=not self._is_healthy(pooled))
+            raise
+        else:
+            self._release(pooled, failed=False)
+
+    def close(self):
+        """Quit every idle driver and refuse further leases."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._discard(pooled)
+
+
+driver_pool = DriverPool()
+atexit.register(driver_pool.close)
@@ -0,0 +1,224 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from segments import group_by_segment
+
+DATABASE = os.getenv('DATABASE', 'subscribers.db')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '16384'))
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+SUBSCRIBER_CHUNK_SIZE = int(os.getenv('SUBSCRIBER_CHUNK_SIZE', '1000'))
+SUBSCRIBE_COALESCE_MS = float(os.getenv('SUBSCRIBE_COALESCE_MS', '5'))  # how long to gather single subscribes
+SUBSCRIBE_COALESCE_MAX = int(os.getenv('SUBSCRIBE_COALESCE_MAX', '500'))  # most subscribes per transaction
+
+# Statements are module constants so each pooled connection compiles them once
+# and reuses the prepared statement from sqlite3's per-connection cache
+INSERT_SUBSCRIBER = "INSERT INTO subscribers (email, preference) VALUES (?, ?)"
+SELECT_EMAILS = "SELECT email FROM subscribers"
+SELECT_PREFERENCES = "SELECT DISTINCT preference FROM subscribers"
+
+
+class ConnectionPool:
+    """A thread-safe pool of SQLite connections configured for concurrent use.
+
+    Connections run in WAL mode, so readers never block the writer, with
+    synchronous=NORMAL (durable at checkpoints, one fsync per checkpoint
+    rather than per commit), a larger page cache and a busy timeout in place
+    of immediate "database is locked" errors.
+    """
+
+    def __init__(self, path, size=DB_POOL_SIZE):
+        self.path = path
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                               check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if not create:
+            return self._idle.get()
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; the block runs in a transaction committed on success."""
+        conn = self._acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+pool = ConnectionPool(DATABASE)
+
+
+def init_db():
+    """Initialize the database and create the subscribers table if it doesn't exist."""
+    with pool.connection() as conn:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS subscribers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            preference TEXT NOT NULL DEFAULT ''
+        )
+        ''')
+
+        # Databases created before preferences were stored lack the column
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(subscribers)")]
+        if 'preference' not in columns:
+            conn.execute("ALTER TABLE subscribers ADD COLUMN preference TEXT NOT NULL DEFAULT ''")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_subscribers_preference ON subscribers (preference, id)")
+
+
+def add_subscriber(email, preference=''):
+    """Add a new subscriber and their section preference; returns False if the email already exists."""
+    try:
+        with pool.connection() as conn:
+            conn.execute(INSERT_SUBSCRIBER, (email, preference))
+        return True
+    except sqlite3.IntegrityError:
+        return False  # Email already exists in the database
+
+
+def add_subscribers(entries):
+    """Add (email, preference) pairs in one transaction.
+
+    Returns one bool per entry: True if it was inserted, False if the email
+    was already subscribed (including an earlier entry in the same batch).
+    Any other error, e.g. a NULL preference, rolls back the whole batch.
+    """
+    with pool.connection() as conn:
+        return [_insert_if_new(conn, entry) for entry in entries]
+
+
+def _insert_if_new(conn, entry):
+    # Only the UNIQUE email constraint means "already subscribed"; OR IGNORE
+    # would also swallow NOT NULL violations and report them as duplicates
+    try:
+        conn.execute(INSERT_SUBSCRIBER, entry)
+    except sqlite3.IntegrityError as e:
+        if 'UNIQUE' not in str(e):
+            raise
+        return False
+    return True
+
+
+class WriteCoalescer:
+    """Group single subscribes from many request threads into shared transactions.
+
+    Callers block on `add()` while a background thread collects everything
+    submitted within `window_ms` (up to `max_batch` entries), writes it with
+    one commit, and hands each caller its own result.
+    """
+
+    def __init__(self, window_ms=SUBSCRIBE_COALESCE_MS, max_batch=SUBSCRIBE_COALESCE_MAX):
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def submit(self, email, preference=''):
+        """Queue a subscribe and return a Future resolving to True (new) or False (duplicate)."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put(((email, preference), future))
+        return future
+
+    def add(self, email, preference=''):
+        """Subscribe an email through the coalescer and wait for the result."""
+        return self.submit(email, preference).result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                results = add_subscribers([entry for entry, _ in batch])
+            except Exception as e:
+                print(f"Error writing batch of {len(batch)} subscribers, retrying one at a time: {e}")
+                self._write_each(batch)
+            else:
+                for (_, future), inserted in zip(batch, results):
+                    future.set_result(inserted)
+
+    def _write_each(self, batch):
+        # One bad entry must not fail the subscribes it happened to share a transaction with
+        for entry, future in batch:
+            try:
+                inserted, = add_subscribers([entry])
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(inserted)
+
+
+subscribe_coalescer = WriteCoalescer()
+
+
+def get_subscribers():
+    """Retrieve all subscribed emails from the database."""
+    with pool.connection() as conn:
+        return [row[0] for row in conn.execute(SELECT_EMAILS)]
+
+
+def get_subscriber_segments():
+    """Group the distinct stored preference strings by the tuple of sections they map to."""
+    with pool.connection() as conn:
+        return group_by_segment(row[0] for row in conn.execute(SELECT_PREFERENCES))
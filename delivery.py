@@ -0,0 +1,123 @@
+import os
+import time
+
+import db
+from mailer import request_refused
+
+DELIVERY_MAX_ATTEMPTS = int(os.getenv('DELIVERY_MAX_ATTEMPTS', '3'))
+# A 'sending' row older than this belongs to a job that died mid-send and may be claimed again
+DELIVERY_LEASE_SECONDS = float(os.getenv('DELIVERY_LEASE_SECONDS', '900'))
+
+CLAIM_DELIVERY = '''
+INSERT INTO deliveries (edition_id, subscriber_id, status, attempts, updated_at) VALUES (?, ?, 'sending', 1, ?)
+ON CONFLICT (edition_id, subscriber_id) DO UPDATE
+SET status = 'sending', attempts = attempts + 1, updated_at = excluded.updated_at
+'''
+RECORD_DELIVERY = '''
+UPDATE deliveries SET status = ?, response = ?, updated_at = ?
+WHERE edition_id = ? AND subscriber_id = (SELECT id FROM subscribers WHERE email = ?)
+'''
+RELEASE_CLAIM = '''
+UPDATE deliveries SET status = 'failed', attempts = MAX(attempts - 1, 0), updated_at = ?
+WHERE edition_id = ? AND subscriber_id = ? AND status = 'sending'
+'''
+# A refused request says nothing about the recipient, so it gives back the attempt its claim took
+RELEASE_DELIVERY = '''
+UPDATE deliveries SET status = ?, response = ?, updated_at = ?, attempts = MAX(attempts - 1, 0)
+WHERE edition_id = ? AND subscriber_id = (SELECT id FROM subscribers WHERE email = ?)
+'''
+
+
+def init_deliveries():
+    """Create the delivery ledger, one row per (edition, subscriber)."""
+    with db.pool.connection() as conn:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS deliveries (
+            edition_id INTEGER NOT NULL,
+            subscriber_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            response TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (edition_id, subscriber_id)
+        )
+        ''')
+
+
+def iter_pending_recipients(edition_id, preferences, chunk_size=db.SUBSCRIBER_CHUNK_SIZE,
+                            max_attempts=DELIVERY_MAX_ATTEMPTS, lease_seconds=DELIVERY_LEASE_SECONDS):
+    """Yield emails of subscribers that still need `edition_id`, checkpointing each page.
+
+    Subscribers already sent the edition, permanently rejected by the provider,
+    or out of attempts are skipped. Each page is marked 'sending' (attempts + 1)
+    in one transaction before its emails are handed to the sender, so a restart
+    resumes after the last recorded page. Keyset pagination (`id > last seen
+    id`) keeps every page an index seek and memory flat for any list size.
+    Rows in 'sending' are left to the job that claimed them until they are
+    `lease_seconds` old; only then are they treated as left behind by a crash
+    and retried, which bounds any duplicates to the batches in flight at the time.
+    Closing the generator early releases the claimed rows it hasn't yielded.
+    """
+    placeholders = ', '.join('?' * len(preferences))
+    query = f'''
+    SELECT s.id, s.email FROM subscribers s
+    LEFT JOIN deliveries d ON d.edition_id = ? AND d.subscriber_id = s.id
+    WHERE s.id > ? AND s.preference IN ({placeholders})
+      AND (d.status IS NULL OR (d.status NOT IN ('sent', 'rejected') AND d.attempts < ?
+                                AND (d.status != 'sending' OR d.updated_at < ?)))
+    ORDER BY s.id LIMIT ?
+    '''
+    last_id = 0
+    while True:
+        with db.pool.connection() as conn:
+            # Take the write lock before reading, so two jobs can't both claim the same page
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            rows = conn.execute(query, [edition_id, last_id, *preferences, max_attempts,
+                                        now - lease_seconds, chunk_size]).fetchall()
+            conn.executemany(CLAIM_DELIVERY, [(edition_id, subscriber_id, now) for subscriber_id, _ in rows])
+        for index, (_, email) in enumerate(rows):
+            try:
+                yield email
+            except GeneratorExit:
+                # The sender stopped early: hand back the rest of the page without using up an attempt
+                with db.pool.connection() as conn:
+                    conn.executemany(RELEASE_CLAIM, [(time.time(), edition_id, subscriber_id)
+                                                     for subscriber_id, _ in rows[index + 1:]])
+                raise
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def delivery_status(result):
+    """Ledger status for a final send result: sent, rejected (SendGrid named the recipient) or failed.
+
+    Only 'rejected' is permanent; transient failures and refused requests
+    (e.g. a revoked API key) stay retryable.
+    """
+    if result['ok']:
+        return 'sent'
+    return 'rejected' if result.get('rejected') else 'failed'
+
+
+def record_results(edition_id, results):
+    """Record the outcome of one sent batch in a single transaction."""
+    now = time.time()
+    rows = {RECORD_DELIVERY: [], RELEASE_DELIVERY: []}
+    for result in results:
+        statement = RELEASE_DELIVERY if request_refused(result) else RECORD_DELIVERY
+        rows[statement].append((delivery_status(result),
+                                f"{result['status']} {result['error'] or ''}".strip()[:500],
+                                now, edition_id, result['email']))
+    with db.pool.connection() as conn:
+        for statement, params in rows.items():
+            conn.executemany(statement, params)
+
+
+def delivery_counts(edition_id):
+    """Count the ledger rows of an edition by status."""
+    with db.pool.connection() as conn:
+        return dict(conn.execute(
+            "SELECT status, COUNT(*) FROM deliveries WHERE edition_id = ? GROUP BY status", (edition_id,)
+        ).fetchall())
@@ -0,0 +1,70 @@
+import json
+import os
+import time
+
+import db
+
+# Reuse an edition built earlier in the same news cycle unless it is older than this
+EDITION_MAX_AGE_HOURS = float(os.getenv('EDITION_MAX_AGE_HOURS', '12'))
+
+
+def current_cycle():
+    """The news cycle an edition belongs to: one per local calendar day."""
+    return time.strftime('%Y-%m-%d')
+
+
+def init_editions():
+    """Create the editions table if it doesn't exist."""
+    with db.pool.connection() as conn:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS editions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cycle TEXT NOT NULL,
+            built_at REAL NOT NULL,
+            sections TEXT NOT NULL
+        )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_editions_cycle ON editions (cycle, id)")
+
+
+def save_edition(sections, cycle=None):
+    """Store a built edition and return its id.
+
+    `sections` maps a section key to {'title', 'articles', 'html'}, where the
+    articles carry their titles, links and summaries and 'html' is the
+    rendered section fragment.
+    """
+    with db.pool.connection() as conn:
+        cursor = conn.execute(
+            "INSERT INTO editions (cycle, built_at, sections) VALUES (?, ?, ?)",
+            (cycle or current_cycle(), time.time(), json.dumps(sections))
+        )
+        return cursor.lastrowid
+
+
+def _edition_from_row(row):
+    edition_id, cycle, built_at, sections = row
+    return {'id': edition_id, 'cycle': cycle, 'built_at': built_at, 'sections': json.loads(sections)}
+
+
+def get_edition(edition_id):
+    """Return a stored edition, or None."""
+    with db.pool.connection() as conn:
+        row = conn.execute("SELECT id, cycle, built_at, sections FROM editions WHERE id = ?",
+                           (edition_id,)).fetchone()
+    return _edition_from_row(row) if row else None
+
+
+def find_edition(sections, cycle=None, max_age_hours=EDITION_MAX_AGE_HOURS):
+    """Return the newest edition of the cycle that covers every section in `sections`, or None."""
+    oldest = time.time() - max_age_hours * 3600
+    with db.pool.connection() as conn:
+        rows = conn.execute(
+            "SELECT id, cycle, built_at, sections FROM editions WHERE cycle = ? AND built_at >= ? ORDER BY id DESC",
+            (cycle or current_cycle(), oldest)
+        ).fetchall()
+    for row in rows:
+        edition = _edition_from_row(row)
+        if all(key in edition['sections'] for key in sections):
+            return edition
+    return None
@@ -0,0 +1,347 @@
+import os
+import re
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character-based estimate
+    tiktoken = None
+
+try:
+    from lxml import etree
+except ImportError:  # optional: the pure-Python scanner is used instead
+    etree = None
+
+# Upper bound on the article text sent to the summarizer, in model tokens
+EXTRACT_TOKEN_BUDGET = int(os.getenv('EXTRACT_TOKEN_BUDGET', '1200'))
+EXTRACT_MIN_PARAGRAPH_CHARS = 40
+# Parser backend: 'lxml', 'stream' (pure Python) or 'auto' (lxml when installed)
+EXTRACT_PARSER = os.getenv('EXTRACT_PARSER', 'auto')
+# Stop scanning a page once it has yielded this many times the budget in paragraph text
+EXTRACT_SCAN_FACTOR = 3
+EXTRACT_CHUNK_SIZE = 16 * 1024
+# Bump when a change to the extraction logic should invalidate previously extracted text
+EXTRACTOR_REVISION = 2
+# Paragraphs used when no story container is found, as the original extraction did
+FALLBACK_PARAGRAPHS = 10
+
+BOILERPLATE_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe', 'form', 'button',
+                    'nav', 'header', 'footer', 'aside', 'figure'}
+# Matched against whole id/class tokens (split on whitespace, '-' and '_'), so
+# e.g. "site-header" is boilerplate but "headerWrapper" and "threads" are not
+BOILERPLATE_PATTERN = re.compile(
+    r'nav|navbar|navigation|menu|footer|header|sidebar|share|sharing|social|related|recommend\w*|promo\w*|'
+    r'newsletter|subscribe|subscription|advert\w*|ad|ads|sponsor\w*|comments?|breadcrumbs?|byline|caption|'
+    r'credits?|cookies?|modal|popup|paywall',
+    re.I
+)
+ATTRIBUTE_TOKEN = re.compile(r'[\s_-]+')
+CONTENT_PATTERN = re.compile(r'article|story|content|body|entry|post|main|text', re.I)
+BLOCK_TAGS = {'p', 'h2', 'h3', 'li', 'blockquote'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param',
+             'source', 'track', 'wbr'}
+NEVER_BOILERPLATE = {'html', 'body', 'article', 'main'}
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+|(?<=[。！？])\s*')
+WHITESPACE = re.compile(r'\s+')
+
+_encoding = tiktoken.get_encoding('o200k_base') if tiktoken else None
+
+
+def estimate_tokens(text):
+    """Token count of `text` for the summary model; about four characters per token without tiktoken."""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text, token_budget):
+    """The longest prefix of `text` within `token_budget` tokens, cut at a word boundary where there is one."""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        if len(tokens) <= token_budget:
+            return text
+        prefix = _encoding.decode(tokens[:token_budget])
+    else:
+        if len(text) <= token_budget * 4:
+            return text
+        prefix = text[:token_budget * 4]
+    head, space, _ = prefix.rpartition(' ')
+    return head if space and head else prefix
+
+
+def is_boilerplate_attribute(attributes):
+    """Whether any whole token of an element's id/class names a boilerplate element."""
+    return any(BOILERPLATE_PATTERN.fullmatch(token) for token in ATTRIBUTE_TOKEN.split(attributes) if token)
+
+
+def first_paragraphs(html, count=10):
+    """The original extraction: the text of the first `count` <p> elements on the page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    return ' '.join(p.get_text().strip() for p in soup.find_all('p')[:count])
+
+
+class BlockCollector:
+    """Parser target that records the text blocks of a page as the tags stream past.
+
+    Works as an lxml parser target (start/end/data/close) and, through
+    StreamScanner, with the standard library's HTMLParser. Boilerplate
+    subtrees are skipped without being stored, and `done` is set once enough
+    paragraph text has been seen so the caller can stop feeding the page.
+    Each block records the ids of its enclosing elements, nearest first,
+    which is all the container scoring needs. The text of the first
+    `FALLBACK_PARAGRAPHS` <p> elements is also kept unfiltered, in case the
+    filtering leaves nothing.
+    """
+
+    def __init__(self, stop_chars):
+        self.stop_chars = stop_chars
+        self.done = False
+        self.blocks = []
+        self.bonuses = {}
+        self._stack = []  # (tag, element id, is boilerplate)
+        self._skipping = 0
+        self._next_id = 0
+        self._block = None
+        self._in_link = 0
+        self._prose_chars = 0
+        self.first_paragraphs = []
+        self._raw_paragraph = None
+
+    def start(self, tag, attrib):
+        tag = tag.lower()
+        if tag in VOID_TAGS:
+            return
+        if tag == 'p':
+            self._finish_raw_paragraph()
+            if len(self.first_paragraphs) < FALLBACK_PARAGRAPHS:
+                self._raw_paragraph = []
+        # A new block closes an unterminated <p>, as browsers do
+        if self._block is not None and self._block['tag'] == 'p' and tag in BLOCK_TAGS:
+            self.end('p')
+        attributes = f"{attrib.get('id') or ''} {attrib.get('class') or ''}"
+        boilerplate = not self._skipping and tag not in NEVER_BOILERPLATE and (
+            tag in BOILERPLATE_TAGS
+            or (is_boilerplate_attribute(attributes) and not CONTENT_PATTERN.search(attributes))
+        )
+        self._next_id += 1
+        self._stack.append((tag, self._next_id, boilerplate))
+        if boilerplate:
+            self._skipping += 1
+        if self._skipping:
+            return
+        if tag in BLOCK_TAGS:
+            if self._block is None:
+                ancestors = [element_id for name, element_id, _ in reversed(self._stack[:-1])
+                             if name not in BLOCK_TAGS]
+                self._block = {'tag': tag, 'id': self._next_id, 'parts': [], 'link_chars': 0,
+                               'ancestors': ancestors}
+        elif tag == 'a':
+            self._in_link += 1
+        else:
+            bonus = 5 if tag in ('article', 'main') else 0
+            if CONTENT_PATTERN.search(attributes):
+                bonus += 3
+            self.bonuses[self._next_id] = bonus
+
+    def end(self, tag):
+        tag = tag.lower()
+        if tag == 'p':
+            self._finish_raw_paragraph()
+        if tag in VOID_TAGS or not any(name == tag for name, _, _ in self._stack):
+            return
+        while self._stack:
+            name, element_id, boilerplate = self._stack.pop()
+            if boilerplate:
+                self._skipping -= 1
+            elif not self._skipping:
+                if name == 'a' and self._in_link:
+                    self._in_link -= 1
+                elif self._block is not None and element_id == self._block['id']:
+                    self._finish_block()
+            if name == tag:
+                return
+
+    def data(self, data):
+        if self._raw_paragraph is not None:
+            self._raw_paragraph.append(data)
+        if self._skipping or self._block is None:
+            return
+        self._block['parts'].append(data)
+        if self._in_link:
+            self._block['link_chars'] += len(data.strip())
+
+    def close(self):
+        self._finish_raw_paragraph()
+        if self._block is not None:
+            self._finish_block()
+
+    def _finish_raw_paragraph(self):
+        if self._raw_paragraph is None:
+            return
+        text = WHITESPACE.sub(' ', ''.join(self._raw_paragraph)).strip()
+        self._raw_paragraph = None
+        if text:
+            self.first_paragraphs.append(text)
+
+    def _finish_block(self):
+        block, self._block = self._block, None
+        text = WHITESPACE.sub(' ', ''.join(block.pop('parts'))).strip()
+        if not text:
+            return
+        block['text'] = text
+        self.blocks.append(block)
+        if block['tag'] == 'p' and len(text) >= EXTRACT_MIN_PARAGRAPH_CHARS:
+            self._prose_chars += len(text)
+            if self._prose_chars >= self.stop_chars:
+                self.done = True
+
+
+class StreamScanner(HTMLParser):
+    """Feed a page through the standard library's tokenizer into a BlockCollector."""
+
+    def __init__(self, collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, {name: value for name, value in attrs})
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, {name: value for name, value in attrs})
+        self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+def extractor_settings():
+    """What extract_article_text's output currently depends on, for caches that store that output."""
+    return f"r{EXTRACTOR_REVISION}:{parser_backend()}:{EXTRACT_TOKEN_BUDGET}"
+
+
+def parser_backend():
+    """The parser backend in use: 'lxml' or 'stream'."""
+    if EXTRACT_PARSER == 'stream' or etree is None:
+        return 'stream'
+    return 'lxml'
+
+
+def collect_blocks(html, stop_chars, backend=None):
+    """Stream `html` through the chosen parser until enough paragraph text is collected.
+
+    `html` is the page text or an iterable of text chunks, such as a streamed
+    response; an iterable with a close() method is closed when scanning stops.
+    """
+    collector = BlockCollector(stop_chars)
+    if (backend or parser_backend()) == 'lxml':
+        parser = etree.HTMLParser(target=collector, remove_comments=True)
+    else:
+        parser = StreamScanner(collector)
+    if isinstance(html, str):
+        chunks = (html[offset:offset + EXTRACT_CHUNK_SIZE] for offset in range(0, len(html), EXTRACT_CHUNK_SIZE))
+    else:
+        chunks = html
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            if collector.done:
+                break
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    parser.close()
+    collector.close()
+    return collector.blocks, collector.bonuses, collector.first_paragraphs
+
+
+def _link_density(block):
+    return block['link_chars'] / max(len(block['text']), 1)
+
+
+def _score_containers(blocks, bonuses):
+    """Score each paragraph's parent and grandparent by the prose they hold."""
+    scores = {}
+    for block in blocks:
+        text = block['text']
+        if block['tag'] != 'p' or len(text) < EXTRACT_MIN_PARAGRAPH_CHARS:
+            continue
+        score = 1 + text.count(',') + min(len(text) // 100, 3)
+        for container, share in zip(block['ancestors'][:2], (1.0, 0.5)):
+            if container not in scores:
+                scores[container] = bonuses.get(container, 0)
+            scores[container] += score * share
+    text_chars = dict.fromkeys(scores, 0)
+    link_chars = dict.fromkeys(scores, 0)
+    for block in blocks:
+        for container in block['ancestors']:
+            if container in text_chars:
+                text_chars[container] += len(block['text'])
+                link_chars[container] += block['link_chars']
+    for container in scores:
+        scores[container] *= 1 - min(link_chars[container] / max(text_chars[container], 1), 0.9)
+    return scores
+
+
+def _trim_to_budget(texts, token_budget):
+    kept = []
+    used = 0
+    for text in texts:
+        cost = estimate_tokens(text)
+        if used + cost <= token_budget:
+            kept.append(text)
+            used += cost
+            continue
+        # Fill what's left of the budget with whole sentences of this block
+        for sentence in SENTENCE_END.split(text):
+            cost = estimate_tokens(sentence)
+            if used + cost > token_budget:
+                break
+            kept.append(sentence)
+            used += cost
+        if not kept:
+            # Not even one sentence fits, e.g. one long unpunctuated paragraph
+            kept.append(truncate_to_tokens(text, token_budget))
+        break
+    return ' '.join(kept)
+
+
+def extract_article_text(html, token_budget=None, backend=None):
+    """Return the main story text of an article page, trimmed to `token_budget` tokens.
+
+    `html` is the page text or an iterable of its text chunks.
+
+    Boilerplate elements (navigation, footers, share bars, promos) are skipped,
+    the container holding the most prose is picked, and its blocks are kept
+    in page order until the budget runs out. The page is scanned only until
+    it has yielded a few times the budget in paragraph text. Pages with no
+    recognisable story fall back to their first paragraphs, and to their
+    first paragraphs before any filtering if boilerplate removal left nothing.
+    """
+    token_budget = token_budget or EXTRACT_TOKEN_BUDGET
+    blocks, bonuses, unfiltered = collect_blocks(html, token_budget * 4 * EXTRACT_SCAN_FACTOR, backend)
+    text = _story_text(blocks, bonuses, token_budget)
+    return text or _trim_to_budget(unfiltered, token_budget)
+
+
+def _story_text(blocks, bonuses, token_budget):
+    scores = _score_containers(blocks, bonuses)
+    if not scores:
+        return _trim_to_budget([block['text'] for block in blocks if block['tag'] == 'p'][:FALLBACK_PARAGRAPHS],
+                               token_budget)
+
+    best = max(scores, key=scores.get)
+    texts = []
+    for block in blocks:
+        if best not in block['ancestors']:
+            continue
+        if block['tag'] == 'p' and len(block['text']) < EXTRACT_MIN_PARAGRAPH_CHARS and _link_density(block) > 0.5:
+            continue
+        if block['tag'] == 'li' and _link_density(block) > 0.5:
+            continue
+        texts.append(block['text'])
+    return _trim_to_budget(texts, token_budget)
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+
+import http_client
+from db import ConnectionPool
+
+FETCH_CACHE_DB = os.getenv('FETCH_CACHE_DB', 'fetch_cache.db')
+FETCH_CACHE_TTL_HOURS = float(os.getenv('FETCH_CACHE_TTL_HOURS', '168'))
+FETCH_CACHE_MAX_ENTRIES = int(os.getenv('FETCH_CACHE_MAX_ENTRIES', '5000'))
+
+
+class FetchCache:
+    """Disk cache of extracted article text, revalidated with conditional GETs.
+
+    Only pages that send an ETag or Last-Modified validator are stored. On
+    the next fetch the validators go out as If-None-Match/If-Modified-Since;
+    a 304 is answered from the cache without downloading or re-extracting
+    the page, and since the text is unchanged its summary is a cache hit too.
+    Each entry records the extractor settings it was made with; an entry made
+    with other settings (token budget, parser backend) counts as missing.
+    """
+
+    def __init__(self, path=FETCH_CACHE_DB, ttl_hours=FETCH_CACHE_TTL_HOURS,
+                 max_entries=FETCH_CACHE_MAX_ENTRIES, http_session=None):
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.http_session = http_session or http_client.session
+        self.counts = {'not_modified': 0, 'modified': 0, 'uncached': 0}
+        self._lock = threading.Lock()
+        self._pool = ConnectionPool(path)
+        self._init_db()
+
+    def _init_db(self):
+        with self._pool.connection() as conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                text TEXT NOT NULL,
+                extractor TEXT NOT NULL DEFAULT '',
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            ''')
+            # Caches created before entries recorded their extractor settings lack the column
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(pages)")]
+            if 'extractor' not in columns:
+                conn.execute("ALTER TABLE pages ADD COLUMN extractor TEXT NOT NULL DEFAULT ''")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_used ON pages (last_used)")
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def get(self, url, extractor=''):
+        """Return the cached {'etag', 'last_modified', 'text'} for `url` made by `extractor`, or None."""
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT etag, last_modified, text FROM pages WHERE url = ? AND extractor = ? AND fetched_at >= ?",
+                (url, extractor, time.time() - self.ttl_seconds)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, text = row
+        return {'etag': etag, 'last_modified': last_modified, 'text': text}
+
+    def touch(self, url):
+        """Mark a cached page as still current after a 304."""
+        now = time.time()
+        with self._pool.connection() as conn:
+            conn.execute("UPDATE pages SET fetched_at = ?, last_used = ? WHERE url = ?", (now, now, url))
+
+    def put(self, url, etag, last_modified, text, extractor=''):
+        """Store a page's validators and text, evicting the least recently used pages over the limit."""
+        now = time.time()
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, text, extractor, fetched_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, text, extractor, now, now)
+            )
+            conn.execute("DELETE FROM pages WHERE fetched_at < ?", (now - self.ttl_seconds,))
+            overflow = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM pages WHERE url IN (SELECT url FROM pages ORDER BY last_used LIMIT ?)",
+                    (overflow,)
+                )
+
+    def fetch_text(self, url, extract, extractor=''):
+        """Return `extract` applied to the page's streamed text, or the cached result if unchanged.
+
+        `extractor` identifies the settings `extract` runs with (see
+        extract.extractor_settings); text cached under other settings is
+        fetched and extracted again.
+        """
+        cached = self.get(url, extractor)
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        with self.http_session.get(url, headers=headers, stream=True, timeout=http_client.HTTP_TIMEOUT) as response:
+            if response.status_code == 304 and cached:
+                self.touch(url)
+                self._count('not_modified')
+                return cached['text']
+            response.raise_for_status()
+            text = extract(http_client.iter_response_text(response))
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+        self._count('modified' if cached else 'uncached')
+        if text and (etag or last_modified):
+            self.put(url, etag, last_modified, text, extractor)
+        return text
+
+    def stats(self):
+        """Return how many fetches were served by a 304, changed, or had no cached copy."""
+        with self._lock:
+            return dict(self.counts)
@@ -0,0 +1,91 @@
+import codecs
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import httpx
+except ImportError:  # only needed to give the OpenAI client a pooled transport
+    httpx = None
+
+# Keep-alive connection pools: how many hosts to keep pools for, and connections per host
+HTTP_POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', '16'))
+HTTP_POOL_PER_HOST = int(os.getenv('HTTP_POOL_PER_HOST', '8'))
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '10'))
+# Stop reading a page after this many (decompressed) bytes
+HTTP_MAX_RESPONSE_BYTES = int(os.getenv('HTTP_MAX_RESPONSE_BYTES', str(2 * 1024 * 1024)))
+HTTP_CHUNK_SIZE = 16 * 1024
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+def build_session(pool_hosts=HTTP_POOL_HOSTS, per_host=HTTP_POOL_PER_HOST):
+    """Create a requests session with per-host keep-alive pools and compressed responses.
+
+    Accept-Encoding lists every coding urllib3 can decode here, which
+    includes br when the brotli package is installed.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=per_host)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'Connection': 'keep-alive',
+    })
+    return session
+
+
+# Shared by scraping and SendGrid so connections to a host are reused across requests
+session = build_session()
+
+
+def iter_response_text(response, max_bytes=None):
+    """Yield the decoded text of a streamed response in chunks, up to `max_bytes` bytes.
+
+    Pages without a declared charset are decoded as UTF-8.
+    """
+    max_bytes = max_bytes or HTTP_MAX_RESPONSE_BYTES
+    charset_declared = 'charset' in response.headers.get('Content-Type', '').lower()
+    decoder = codecs.getincrementaldecoder(
+        response.encoding if charset_declared and response.encoding else 'utf-8'
+    )(errors='replace')
+    received = 0
+    for chunk in response.iter_content(HTTP_CHUNK_SIZE):
+        chunk = chunk[:max_bytes - received]
+        received += len(chunk)
+        yield decoder.decode(chunk)
+        if received >= max_bytes:
+            print(f"Stopped reading {response.url} after {received} bytes")
+            return
+    yield decoder.decode(b'', final=True)
+
+
+def iter_text(url, max_bytes=None, timeout=HTTP_TIMEOUT, http_session=None):
+    """Stream a page and yield its decoded text in chunks, up to `max_bytes` bytes.
+
+    Stop iterating (or close the generator) to abandon the rest of the body;
+    a fully read response returns its connection to the pool, an abandoned
+    one closes it.
+    """
+    with (http_session or session).get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        yield from iter_response_text(response, max_bytes)
+
+
+def get_text(url, max_bytes=None, timeout=HTTP_TIMEOUT, http_session=None):
+    """Fetch a page's text through the shared session, bounded to `max_bytes` bytes."""
+    return ''.join(iter_text(url, max_bytes, timeout, http_session))
+
+
+def openai_http_client():
+    """An httpx client with keep-alive pooling for the OpenAI SDK, or None without httpx."""
+    if httpx is None:
+        return None
+    return httpx.Client(
+        timeout=httpx.Timeout(60.0, connect=HTTP_TIMEOUT),
+        limits=httpx.Limits(max_connections=HTTP_POOL_PER_HOST, max_keepalive_connections=HTTP_POOL_PER_HOST),
+    )
@@ -0,0 +1,52 @@
+import os
+import threading
+import time
+
+# How often the ingestion daemon polls every source; 0 disables it
+INGEST_INTERVAL_MINUTES = float(os.getenv('INGEST_INTERVAL_MINUTES', '15'))
+
+
+class IngestDaemon:
+    """Background thread that runs an ingestion pass every `interval_minutes`.
+
+    `ingest` is called with no arguments and returns a JSON-serializable
+    summary of the pass, kept in `last_result`; an exception is logged and
+    the next pass runs on schedule.
+    """
+
+    def __init__(self, ingest, interval_minutes=INGEST_INTERVAL_MINUTES):
+        self.ingest = ingest
+        self.interval_seconds = interval_minutes * 60
+        self.last_run = None
+        self.last_result = None
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.interval_seconds > 0
+
+    def start(self):
+        """Start the daemon thread once, if enabled; later calls are no-ops."""
+        with self._lock:
+            if self._thread or not self.enabled:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Run the next pass now instead of waiting for the interval."""
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            started = time.time()
+            try:
+                self.last_result = self.ingest()
+                print(f"Ingestion pass finished in {time.time() - started:.1f}s: {self.last_result}")
+            except Exception as e:
+                print(f"Ingestion pass failed: {e}")
+            self.last_run = started
+            self._wakeup.wait(max(0.0, self.interval_seconds - (time.time() - started)))
+            self._wakeup.clear()
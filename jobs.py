@@ -0,0 +1,233 @@
+import json
+import os
+import socket
+import threading
+import time
+
+import db
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '1'))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '1'))
+JOB_PROGRESS_FLUSH_SECONDS = float(os.getenv('JOB_PROGRESS_FLUSH_SECONDS', '1'))
+JOB_HEARTBEAT_SECONDS = float(os.getenv('JOB_HEARTBEAT_SECONDS', '10'))
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '60'))  # a running job with no heartbeat for this long is requeued
+
+
+def init_jobs():
+    """Create the jobs table."""
+    with db.pool.connection() as conn:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            payload TEXT NOT NULL DEFAULT '{}',
+            progress TEXT NOT NULL DEFAULT '{}',
+            result TEXT,
+            error TEXT,
+            worker TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            heartbeat_at REAL,
+            finished_at REAL
+        )
+        ''')
+        # Tables created before workers sent heartbeats lack the column
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+        if 'heartbeat_at' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
+
+
+def enqueue_job(kind, payload=None):
+    """Queue a job and return its id."""
+    with db.pool.connection() as conn:
+        cursor = conn.execute(
+            "INSERT INTO jobs (kind, payload, created_at) VALUES (?, ?, ?)",
+            (kind, json.dumps(payload or {}), time.time())
+        )
+        return cursor.lastrowid
+
+
+def claim_job(worker, lease_seconds=JOB_LEASE_SECONDS):
+    """Atomically move the oldest claimable job to running for `worker` and return it, or None.
+
+    Claimable jobs are queued ones and running ones whose worker stopped
+    sending heartbeats `lease_seconds` ago, i.e. died mid-run. Jobs that a
+    live worker is running, in this process or another, are left alone.
+    """
+    now = time.time()
+    with db.pool.connection() as conn:
+        # A single UPDATE takes the write lock, so two workers can never claim the same row
+        claimed = conn.execute(
+            "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, heartbeat_at = ? "
+            "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' "
+            "OR (status = 'running' AND COALESCE(heartbeat_at, started_at, 0) < ?) ORDER BY id LIMIT 1)",
+            (worker, now, now, now - lease_seconds)
+        ).rowcount
+        if not claimed:
+            return None
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE worker = ? AND status = 'running' ORDER BY started_at DESC LIMIT 1", (worker,)
+        ).fetchone()
+    return get_job(row[0])
+
+
+def get_job(job_id):
+    """Return a job as a dict, or None if it doesn't exist."""
+    with db.pool.connection() as conn:
+        cursor = conn.execute(
+            "SELECT id, kind, status, payload, progress, result, error, created_at, started_at, finished_at "
+            "FROM jobs WHERE id = ?", (job_id,)
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    job = dict(zip([column[0] for column in cursor.description], row))
+    for field in ('payload', 'progress', 'result'):
+        job[field] = json.loads(job[field]) if job[field] else None
+    return job
+
+
+def update_payload(job_id, **fields):
+    """Merge `fields` into a job's payload, e.g. to pin decisions a restarted job must repeat."""
+    with db.pool.connection() as conn:
+        row = conn.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        payload = dict(json.loads(row[0]), **fields)
+        conn.execute("UPDATE jobs SET payload = ? WHERE id = ?", (json.dumps(payload), job_id))
+
+
+def heartbeat_jobs(job_ids):
+    """Mark running jobs as still alive."""
+    with db.pool.connection() as conn:
+        conn.executemany("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                         [(time.time(), job_id) for job_id in job_ids])
+
+
+def finish_job(job_id, status, result=None, error=None):
+    """Record a job's final status and result."""
+    with db.pool.connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+        )
+
+
+class JobProgress:
+    """Thread-safe progress counters for a running job, written to the database at most once per interval."""
+
+    def __init__(self, job_id, flush_interval=JOB_PROGRESS_FLUSH_SECONDS):
+        self.job_id = job_id
+        self.flush_interval = flush_interval
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+        self._maybe_flush()
+
+    def set(self, name, value):
+        with self._lock:
+            self.counts[name] = value
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._last_flush = time.monotonic()
+            progress = json.dumps(self.counts)
+        with db.pool.connection() as conn:
+            conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (progress, self.job_id))
+
+
+class JobRunner:
+    """Background worker threads that claim queued jobs and run the handler registered for their kind.
+
+    A handler is called as `handler(payload, progress)` with a JobProgress and
+    returns a JSON-serializable result; raising marks the job failed. While a
+    job runs, a heartbeat thread refreshes its `heartbeat_at` so other
+    workers only take it over once this process has died.
+    """
+
+    def __init__(self, handlers, workers=JOB_WORKERS, poll_interval=JOB_POLL_SECONDS,
+                 heartbeat_interval=JOB_HEARTBEAT_SECONDS):
+        self.handlers = handlers
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker threads once; later calls are no-ops."""
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._run, args=(f"{socket.gethostname()}:{os.getpid()}:{n}",),
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def wake(self):
+        """Tell idle workers a job was just queued."""
+        self._wakeup.set()
+
+    def _run(self, worker):
+        while True:
+            try:
+                job = claim_job(worker)
+            except Exception as e:
+                print(f"Error claiming job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self.run_job(job)
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            with self._lock:
+                running = list(self._running)
+            if not running:
+                continue
+            try:
+                heartbeat_jobs(running)
+            except Exception as e:
+                print(f"Error sending job heartbeat: {e}")
+
+    def run_job(self, job):
+        with self._lock:
+            self._running.add(job['id'])
+        try:
+            self._run_job(job)
+        finally:
+            with self._lock:
+                self._running.discard(job['id'])
+
+    def _run_job(self, job):
+        progress = JobProgress(job['id'])
+        try:
+            handler = self.handlers[job['kind']]
+            print(f"Running job {job['id']} ({job['kind']})...")
+            result = handler(job['payload'], progress)
+        except Exception as e:
+            print(f"Job {job['id']} failed: {e}")
+            progress.flush()
+            finish_job(job['id'], 'failed', error=str(e))
+        else:
+            progress.flush()
+            finish_job(job['id'], 'done', result=result)
+            print(f"Job {job['id']} finished: {result}")
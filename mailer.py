@@ -0,0 +1,304 @@
+import heapq
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from email.utils import parsedate_to_datetime
+from itertools import count, islice
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_client import build_session
+
+SENDGRID_HOST = os.getenv('SENDGRID_HOST', 'https://api.sendgrid.com')
+SENDGRID_BATCH_SIZE = int(os.getenv('SENDGRID_BATCH_SIZE', '1000'))  # API limit on personalizations per request
+SENDGRID_MAX_WORKERS = int(os.getenv('SENDGRID_MAX_WORKERS', '4'))
+SENDGRID_RATE_LIMIT = float(os.getenv('SENDGRID_RATE_LIMIT', '10'))  # starting requests per second, 0 disables
+SENDGRID_MAX_RATE = float(os.getenv('SENDGRID_MAX_RATE', '50'))  # ceiling the limiter may climb to
+SENDGRID_MIN_RATE = float(os.getenv('SENDGRID_MIN_RATE', '0.5'))
+SENDGRID_MAX_RETRIES = int(os.getenv('SENDGRID_MAX_RETRIES', '5'))
+SENDGRID_BACKOFF_BASE = float(os.getenv('SENDGRID_BACKOFF_BASE', '1'))  # seconds before the first retry
+SENDGRID_BACKOFF_MAX = float(os.getenv('SENDGRID_BACKOFF_MAX', '60'))
+
+# SendGrid reports a bad recipient in a 400 response as e.g. "personalizations.3.to"
+PERSONALIZATION_FIELD = re.compile(r'^personalizations\.(\d+)\b')
+
+# Statuses worth retrying; every other 4xx means the request itself is wrong
+TRANSIENT_STATUSES = {408, 429}
+
+
+class AdaptiveRateLimiter:
+    """Token bucket shared by all delivery workers whose rate adapts to the provider.
+
+    Every accepted request nudges the rate up additively towards `max_rate`;
+    a 429 or 5xx halves it (down to `min_rate`) and, when the provider sent a
+    Retry-After, pauses the bucket until then.
+    """
+
+    def __init__(self, rate, max_rate=SENDGRID_MAX_RATE, min_rate=SENDGRID_MIN_RATE):
+        self.enabled = rate > 0
+        self.rate = rate
+        self.max_rate = max(rate, max_rate)
+        self.min_rate = min(rate, min_rate) if self.enabled else min_rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may start."""
+        if not self.enabled:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 0.1)
+            self.capacity = max(1.0, self.rate)
+
+    def on_throttle(self, retry_after=None):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.capacity = max(1.0, self.rate)
+            self.tokens = 0.0
+            self._updated = time.monotonic()
+            if retry_after:
+                self._paused_until = max(self._paused_until, self._updated + retry_after)
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header given in seconds or as an HTTP date; None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with jitter for the given attempt, never shorter than Retry-After."""
+    delay = min(SENDGRID_BACKOFF_MAX, SENDGRID_BACKOFF_BASE * 2 ** (attempt - 1))
+    return max(random.uniform(delay / 2, delay), retry_after or 0.0)
+
+
+def is_transient(status):
+    """Whether a failed request may succeed if retried; None means no response at all."""
+    return status is None or status >= 500 or status in TRANSIENT_STATUSES
+
+
+def request_refused(result):
+    """Whether a final result failed because SendGrid refused the request or account, not the recipient.
+
+    That covers 401/403 (bad or revoked API key) and any other non-transient
+    error that doesn't name this recipient's personalization.
+    """
+    return not result['ok'] and not result['transient'] and not result.get('rejected')
+
+
+def chunked(iterable, size):
+    """Yield lists of up to `size` items without materializing the whole iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class BulkMailer:
+    """Send one message to many recipients through SendGrid's v3 mail/send API.
+
+    Recipients are packed into batches of personalizations (one per recipient,
+    so nobody sees the other addresses), batches are posted concurrently over a
+    single pooled HTTP session, and every recipient gets its own result.
+    Transiently failed batches go to a retry queue with jittered exponential
+    backoff, and all requests pass through one adaptive rate limiter.
+    """
+
+    def __init__(self, api_key, sender, host=SENDGRID_HOST, batch_size=SENDGRID_BATCH_SIZE,
+                 max_workers=SENDGRID_MAX_WORKERS, rate_limit=SENDGRID_RATE_LIMIT,
+                 max_retries=SENDGRID_MAX_RETRIES, session=None):
+        self.api_key = api_key
+        self.sender = sender
+        self.url = host.rstrip('/') + '/v3/mail/send'
+        self.batch_size = max(1, min(batch_size, 1000))
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.rate_limiter = AdaptiveRateLimiter(rate_limit)
+        self.session = session or build_session()
+        self.session.mount(self.url, HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers))
+
+    def build_payload(self, subject, content, recipients, substitutions=None):
+        """Build the mail/send request body for one batch of recipient emails.
+
+        `substitutions`, if given, maps a recipient email to the tokens SendGrid
+        should replace in that recipient's copy of the content.
+        """
+        personalizations = []
+        for email in recipients:
+            personalization = {'to': [{'email': email}]}
+            if substitutions:
+                personalization['substitutions'] = substitutions(email)
+            personalizations.append(personalization)
+        return {
+            'personalizations': personalizations,
+            'from': {'email': self.sender},
+            'subject': subject,
+            'content': [{'type': 'text/html', 'value': content}],
+        }
+
+    def _post(self, payload):
+        self.rate_limiter.acquire()
+        return self.session.post(
+            self.url,
+            json=payload,
+            headers={'Authorization': f'Bearer {self.api_key}'},
+            timeout=30
+        )
+
+    def send_batch(self, subject, content, recipients, substitutions=None):
+        """Make one attempt at a batch and return a result dict for each recipient.
+
+        Failed results say whether they are `transient` (worth retrying) or
+        `rejected` (SendGrid named that recipient as invalid), and carry the
+        provider's Retry-After, if any. A failure that is neither means the
+        request or the account was refused (e.g. a revoked API key), not the recipient.
+        """
+        def results(ok, status, error=None, emails=recipients, retry_after=None, rejected=False):
+            transient = not ok and is_transient(status)
+            return [{'email': email, 'ok': ok, 'status': status, 'error': error,
+                     'transient': transient, 'rejected': rejected, 'retry_after': retry_after}
+                    for email in emails]
+
+        try:
+            response = self._post(self.build_payload(subject, content, recipients, substitutions))
+        except requests.RequestException as e:
+            print(f"Error sending batch of {len(recipients)} emails: {e}")
+            return results(False, None, str(e))
+
+        if response.status_code < 300:
+            self.rate_limiter.on_success()
+            return results(True, response.status_code)
+
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if response.status_code == 429 or response.status_code >= 500:
+            self.rate_limiter.on_throttle(retry_after)
+
+        rejected = self._rejected_recipients(response, recipients)
+        if response.status_code == 400 and rejected and len(rejected) < len(recipients):
+            # Drop the recipients SendGrid named as invalid and send the rest of the batch again
+            failed = [result for email, error in rejected.items()
+                      for result in results(False, 400, error, [email], rejected=True)]
+            remaining = [email for email in recipients if email not in rejected]
+            return failed + self.send_batch(subject, content, remaining, substitutions)
+
+        print(f"SendGrid rejected batch of {len(recipients)} emails. Status code: {response.status_code}")
+        if response.status_code == 400 and len(rejected) == len(recipients):
+            return [result for email, error in rejected.items()
+                    for result in results(False, 400, error, [email], rejected=True)]
+        return results(False, response.status_code, response.text, retry_after=retry_after)
+
+    def _rejected_recipients(self, response, recipients):
+        """Map recipients SendGrid flagged in a 400 response to their error message."""
+        try:
+            errors = response.json().get('errors', [])
+        except ValueError:
+            return {}
+        rejected = {}
+        for error in errors:
+            match = PERSONALIZATION_FIELD.match(error.get('field') or '')
+            if match and int(match.group(1)) < len(recipients):
+                rejected[recipients[int(match.group(1))]] = error.get('message', '')
+        return rejected
+
+    def iter_send_batches(self, subject, content, recipients, substitutions=None):
+        """Send to every recipient in `recipients` (any iterable), yielding lists of final results.
+
+        Recipients are pulled from the iterable only as batches are submitted, so
+        a streamed subscriber list is never held in memory all at once. Recipients
+        whose batch failed transiently are re-queued with backoff and only
+        yielded once they succeed, fail permanently or run out of retries; each
+        result then carries its number of `attempts`. Once a request is refused
+        outright (see request_refused), no further batches are started, since
+        they would all be refused the same way.
+        """
+        batches = chunked(recipients, self.batch_size)
+        exhausted = False
+        retries = []  # heap of (ready_at, sequence, recipients, attempt)
+        sequence = count()
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                # Keep a bounded number of batches in flight, due retries first
+                while len(pending) < self.max_workers * 2:
+                    if retries and retries[0][0] <= time.monotonic():
+                        _, _, batch, attempt = heapq.heappop(retries)
+                    elif not exhausted:
+                        batch = next(batches, None)
+                        if batch is None:
+                            exhausted = True
+                            continue
+                        attempt = 1
+                    else:
+                        break
+                    future = executor.submit(self.send_batch, subject, content, batch, substitutions)
+                    pending[future] = attempt
+
+                if not pending:
+                    if not retries:
+                        return
+                    time.sleep(max(0.0, retries[0][0] - time.monotonic()))
+                    continue
+
+                timeout = max(0.0, retries[0][0] - time.monotonic()) if retries else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    attempt = pending.pop(future)
+                    final = []
+                    retry = []
+                    for result in future.result():
+                        result['attempts'] = attempt
+                        if result['ok'] or not result['transient'] or attempt > self.max_retries:
+                            final.append(result)
+                        else:
+                            retry.append(result)
+                    if retry:
+                        retry_after = max(result['retry_after'] or 0.0 for result in retry)
+                        delay = backoff_delay(attempt, retry_after)
+                        print(f"Retrying {len(retry)} emails in {delay:.1f}s (attempt {attempt + 1}).")
+                        heapq.heappush(retries, (time.monotonic() + delay, next(sequence),
+                                                 [result['email'] for result in retry], attempt + 1))
+                    if final:
+                        if any(request_refused(result) for result in final):
+                            exhausted = True
+                        yield final
+
+    def iter_send(self, subject, content, recipients, substitutions=None):
+        """Like iter_send_batches, but yield one result per recipient."""
+        for results in self.iter_send_batches(subject, content, recipients, substitutions):
+            yield from results
+
+    def send(self, subject, content, recipients, substitutions=None):
+        """Send to every recipient in `recipients` and return the list of per-recipient results."""
+        return list(self.iter_send(subject, content, recipients, substitutions))
@@ -0,0 +1,168 @@
+import html
+import json
+import os
+import re
+import threading
+from collections import Counter
+from html.parser import HTMLParser
+
+from http_client import iter_text
+
+# Summarize from the listing dek or the article's <head> metadata when it is at least this long
+SUMMARY_METADATA = os.getenv('SUMMARY_METADATA', '1').lower() in ('1', 'true', 'yes')
+METADATA_MIN_CHARS = int(os.getenv('METADATA_MIN_CHARS', '80'))
+# Longer metadata (usually a lead excerpt) is cut to its first sentences within this length
+METADATA_MAX_CHARS = int(os.getenv('METADATA_MAX_CHARS', '400'))
+METADATA_MAX_SENTENCES = 3
+# Give up looking for </head> after this many bytes
+METADATA_HEAD_MAX_BYTES = int(os.getenv('METADATA_HEAD_MAX_BYTES', str(64 * 1024)))
+
+# Meta tags in order of preference; JSON-LD comes right after og:description
+META_DESCRIPTIONS = ['og:description', 'description', 'twitter:description']
+WHITESPACE = re.compile(r'\s+')
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Which tier produced each article's summary, for this process
+tier_counts = Counter()
+_tier_lock = threading.Lock()
+
+
+class HeadScanner(HTMLParser):
+    """Collect description meta tags and JSON-LD blocks until the <head> ends."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.json_ld = []
+        self.done = False
+        self._in_json_ld = False
+        self._json_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag == 'body':
+            self.done = True
+        elif tag == 'meta':
+            name = (attributes.get('property') or attributes.get('name') or '').lower()
+            if name in META_DESCRIPTIONS and attributes.get('content'):
+                self.meta.setdefault(name, attributes['content'])
+        elif tag == 'script' and (attributes.get('type') or '').lower() == 'application/ld+json':
+            self._in_json_ld = True
+            self._json_parts = []
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.done = True
+        elif tag == 'script' and self._in_json_ld:
+            self._in_json_ld = False
+            self.json_ld.append(''.join(self._json_parts))
+
+    def handle_data(self, data):
+        if self._in_json_ld:
+            self._json_parts.append(data)
+
+
+def clean(text):
+    """Collapse whitespace and decode entities left in metadata text."""
+    return WHITESPACE.sub(' ', html.unescape(text or '')).strip()
+
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
+
+def _block_description(block):
+    data = json.loads(block)
+    objects = [obj for obj in _as_list(data) if isinstance(obj, dict)]
+    objects = [item for obj in objects for item in [obj, *_as_list(obj.get('@graph', []))] if isinstance(item, dict)]
+    for obj in objects:
+        kinds = _as_list(obj.get('@type'))
+        description = obj.get('description')
+        if description and isinstance(description, str) and any(
+                isinstance(k, str) and k.endswith('Article') for k in kinds):
+            return description
+    return None
+
+
+def json_ld_description(blocks):
+    """Return the description of the first article-like JSON-LD object, or None.
+
+    A malformed or oddly shaped block is skipped rather than failing the lookup.
+    """
+    for block in blocks:
+        try:
+            description = _block_description(block)
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Skipping unreadable JSON-LD block: {e}")
+            continue
+        if description:
+            return description
+    return None
+
+
+def read_head_metadata(url, max_bytes=None):
+    """Stream just the <head> of a page and return its descriptions, best first."""
+    scanner = HeadScanner()
+    chunks = iter_text(url, max_bytes=max_bytes or METADATA_HEAD_MAX_BYTES)
+    try:
+        for chunk in chunks:
+            scanner.feed(chunk)
+            if scanner.done:
+                break
+    finally:
+        chunks.close()
+    descriptions = [scanner.meta.get('og:description'), json_ld_description(scanner.json_ld)]
+    descriptions += [scanner.meta.get(name) for name in META_DESCRIPTIONS[1:]]
+    return [clean(description) for description in descriptions if description and isinstance(description, str)]
+
+
+def condense(text):
+    """The first few whole sentences of `text` within METADATA_MAX_CHARS, or '' if not even one fits."""
+    kept = []
+    length = 0
+    for sentence in SENTENCE_END.split(text)[:METADATA_MAX_SENTENCES]:
+        length += len(sentence) + bool(kept)
+        if length > METADATA_MAX_CHARS:
+            break
+        kept.append(sentence)
+    return ' '.join(kept)
+
+
+def usable(article, text):
+    """Whether metadata text says enough to stand in for a summary."""
+    return bool(text) and len(text) >= METADATA_MIN_CHARS and text.lower() != article['title'].lower()
+
+
+def _count(tier):
+    with _tier_lock:
+        tier_counts[tier] += 1
+
+
+def metadata_summary(article):
+    """Summarize an article from metadata alone, or return None if it needs the full page.
+
+    Tries the dek collected from the listing page first, then the
+    descriptions in the article's <head>, read without downloading the body.
+    Long metadata is cut to its first sentences; metadata whose first sentence
+    alone is too long is passed over, so the article goes to the model instead.
+    """
+    dek = condense(clean(article.get('dek')))
+    if usable(article, dek):
+        _count('dek')
+        return dek
+    try:
+        for description in read_head_metadata(article['link']):
+            description = condense(description)
+            if usable(article, description):
+                _count('head')
+                return description
+    except Exception as e:
+        print(f"Error reading metadata from {article['link']}: {e}")
+    _count('full')
+    return None
+
+
+def tier_stats():
+    """Return how many summaries came from listing deks, <head> metadata and full pages."""
+    with _tier_lock:
+        return dict(tier_counts)
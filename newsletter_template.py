@@ -0,0 +1,73 @@
+import html
+import re
+
+TOKEN_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+NEWSLETTER_FOOTER = "<p style='font-size:12px;color:#888'>You are receiving this newsletter because {{email}} subscribed.</p>"
+
+
+def escape(text):
+    """HTML-escape scraped text, including braces so it can never be read as a template token."""
+    return html.escape(text or '', quote=True).replace('{', '&#123;').replace('}', '&#125;')
+
+
+class CompiledTemplate:
+    """Template text split once into literal fragments and {{token}} slots.
+
+    Rendering is a single join over the cached fragments, so the cost per
+    recipient depends only on the number of tokens, not on the body size.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._parts = []
+        self._slots = []
+        self._raw_tokens = {}
+        position = 0
+        for match in TOKEN_PATTERN.finditer(text):
+            self._parts.append(text[position:match.start()])
+            self._slots.append((len(self._parts), match.group(1)))
+            self._parts.append('')
+            self._raw_tokens.setdefault(match.group(1), set()).add(match.group(0))
+            position = match.end()
+        self._parts.append(text[position:])
+
+    @property
+    def tokens(self):
+        return set(self._raw_tokens)
+
+    def render(self, **values):
+        """Return the text with every token replaced by its value."""
+        parts = self._parts[:]
+        for index, name in self._slots:
+            parts[index] = values[name]
+        return ''.join(parts)
+
+    def substitutions(self, **values):
+        """Map each token as written in the text to its value, for SendGrid personalizations."""
+        return {raw: values[name] for name, raws in self._raw_tokens.items() for raw in raws}
+
+
+def render_article(item):
+    """Render one article as a list item."""
+    fragment = f"<li><strong>{escape(item['title'])}</strong>"
+    if item['summary'] and item['summary'] != "Summary not available":
+        fragment += f"<p>{escape(item['summary'])}</p>"
+    return fragment + f"<a href='{escape(item['link'])}'>Read more</a></li>"
+
+
+def render_section(title, items):
+    """Render a newsletter section once; the fragment is shared by every recipient."""
+    if not items:
+        return f"<h2>{title} News</h2><ul><p>No {title} news available today.</p></ul>"
+    return f"<h2>{title} News</h2><ul>" + ''.join(render_article(item) for item in items) + "</ul>"
+
+
+def assemble_newsletter(fragments, heading="Today's Finance & Tech News"):
+    """Join already-rendered section fragments into a compiled newsletter template."""
+    return CompiledTemplate(f"<h1>{heading}</h1>" + ''.join(fragments) + NEWSLETTER_FOOTER)
+
+
+def build_newsletter(sections, heading="Today's Finance & Tech News"):
+    """Assemble the newsletter from (section title, articles) pairs into a compiled template."""
+    return assemble_newsletter([render_section(title, items) for title, items in sections], heading)
@@ -0,0 +1,118 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import zip_longest
+from urllib.parse import urlparse
+
+# Global cap on articles processed at once, and a per-host cap so we don't hammer one site
+PIPELINE_MAX_WORKERS = int(os.getenv('PIPELINE_MAX_WORKERS', '8'))
+PIPELINE_PER_HOST_LIMIT = int(os.getenv('PIPELINE_PER_HOST_LIMIT', '3'))
+
+
+class HostLimiter:
+    """Limit the number of concurrent requests made to any single host."""
+
+    def __init__(self, limit):
+        self.limit = max(1, limit)
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.limit)
+            return self._semaphores[host]
+
+    @contextmanager
+    def slot(self, url):
+        """Hold one of the host's slots for the duration of the block."""
+        semaphore = self._semaphore(urlparse(url).netloc.lower())
+        with semaphore:
+            yield
+
+
+def interleave_by_host(articles):
+    """Reorder articles round-robin across hosts so one busy host doesn't block the queue."""
+    by_host = {}
+    for article in articles:
+        by_host.setdefault(urlparse(article['link']).netloc.lower(), []).append(article)
+    ordered = []
+    for group in zip_longest(*by_host.values()):
+        ordered.extend(article for article in group if article is not None)
+    return ordered
+
+
+def process_articles(sections, fetch_text, summarize, max_workers=None, per_host_limit=None, on_article=None,
+                     summarize_many=None, skip=None, describe=None):
+    """Fetch and summarize the articles of every section concurrently.
+
+    `sections` maps a section name to a list of {'title', 'link'} dicts. The
+    page download runs inside a per-host slot, the summarization runs outside
+    it, and the whole run is bounded by the worker pool size. Returns the same
+    mapping with a 'summary' added to each article, keeping the original order.
+    `on_article`, if given, is called with each article as soon as it is summarized.
+
+    If `summarize_many` is given, every page is fetched first and the texts are
+    summarized together with one call to it, which takes a list of texts and
+    returns their summaries in the same order; `summarize` is then unused.
+
+    If `skip` is given, it is called with each article and its fetched text,
+    and articles it returns True for are dropped without being summarized.
+
+    If `describe` is given, it is called first with each article (inside the
+    host slot) and may return a summary built from cheaper metadata; the page
+    is then neither fetched nor summarized, and `skip` gets that metadata text
+    in place of the page text.
+    """
+    max_workers = max_workers or PIPELINE_MAX_WORKERS
+    limiter = HostLimiter(per_host_limit or PIPELINE_PER_HOST_LIMIT)
+
+    def fetch(article):
+        """Return (summary from metadata, None) or (None, page text)."""
+        with limiter.slot(article['link']):
+            described = describe(article) if describe else None
+            if described is not None:
+                return described, None
+            return None, fetch_text(article['link'])
+
+    def process(article):
+        described, article_text = fetch(article)
+        if skip and skip(article, described if described is not None else article_text):
+            return None
+        if described is not None:
+            summarized = dict(article, summary=described)
+        else:
+            summarized = dict(article, summary=summarize(article_text))
+        if on_article:
+            on_article(summarized)
+        return summarized
+
+    all_articles = [article for articles in sections.values() for article in articles]
+    if not all_articles:
+        return {name: [] for name in sections}
+
+    if summarize_many:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(all_articles))) as executor:
+            futures = {id(article): executor.submit(fetch, article)
+                       for article in interleave_by_host(all_articles)}
+            fetched = [futures[id(article)].result() for article in all_articles]
+        kept = [(article, described, article_text) for article, (described, article_text) in zip(all_articles, fetched)
+                if not (skip and skip(article, described if described is not None else article_text))]
+        texts = [article_text for _, described, article_text in kept if described is None]
+        summaries = iter(summarize_many(texts) if texts else [])
+        summarized = {}
+        for article, described, _ in kept:
+            summary = described if described is not None else next(summaries)
+            summarized[id(article)] = dict(article, summary=summary)
+            if on_article:
+                on_article(summarized[id(article)])
+        return {name: [summarized[id(article)] for article in articles if id(article) in summarized]
+                for name, articles in sections.items()}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(all_articles))) as executor:
+        futures = {id(article): executor.submit(process, article)
+                   for article in interleave_by_host(all_articles)}
+        results = {name: [futures[id(article)].result() for article in articles]
+                   for name, articles in sections.items()}
+    return {name: [article for article in articles if article is not None] for name, articles in results.items()}
@@ -0,0 +1,45 @@
+import json
+import os
+
+# Optional JSON file that replaces the built-in source registry
+SOURCES_FILE = os.getenv('SOURCES_FILE', 'sources.json')
+
+# Newsletter sections in order, each with its title, the preference labels
+# that select it, and its sources. A source is either a feed
+# ({"feed": url}) or a listing page ({"listing": url, "selector": css}),
+# optionally with a "limit" (default 5) and a "domain" its links must be on.
+# A source with "fallback": true is only fetched when the section's other
+# sources come back with fewer links than their limits add up to.
+DEFAULT_REGISTRY = {
+    'finance': {
+        'title': 'Finance',
+        'labels': ['finance & markets'],
+        'sources': [
+            {'name': 'CNBC Finance',
+             'feed': 'https://search.cnbc.com/rs/search/combinedcms/view.xml?partnerId=wrss01&id=10000664'},
+            {'name': 'CNBC Finance listing', 'listing': 'https://www.cnbc.com/finance/',
+             'selector': 'div.Card-titleContainer a', 'fallback': True},
+        ],
+    },
+    'tech': {
+        'title': 'Tech',
+        'labels': ['tech news'],
+        'sources': [
+            {'name': 'The Verge', 'feed': 'https://www.theverge.com/rss/tech/index.xml',
+             'domain': 'theverge.com'},
+            {'name': 'The Verge listing', 'listing': 'https://www.theverge.com/tech', 'selector': 'h2 a',
+             'domain': 'theverge.com', 'fallback': True},
+        ],
+    },
+}
+
+
+def load_registry(path=SOURCES_FILE):
+    """Return the section registry from `path` if it exists, else the built-in one."""
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as registry_file:
+            return json.load(registry_file)
+    return DEFAULT_REGISTRY
+
+
+REGISTRY = load_registry()
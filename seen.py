@@ -0,0 +1,164 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import db
+
+# Skip stories already covered by an edition of an earlier cycle within this window
+SEEN_WINDOW_HOURS = float(os.getenv('SEEN_WINDOW_HOURS', '72'))
+# SimHash fingerprints this many bits apart or closer count as the same story;
+# extracted article text is short, so a rewritten sentence moves several bits
+SIMHASH_MAX_DISTANCE = int(os.getenv('SIMHASH_MAX_DISTANCE', '8'))
+SIMHASH_SHINGLE = 3
+
+TRACKING_PARAM = re.compile(r'^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|cmpid|ref|ref_src|__source|taid|tpcc|recirc)$', re.I)
+WORD = re.compile(r'\w+')
+
+UPSERT_SEEN = '''
+INSERT INTO seen_articles (url, fingerprint, cycle, covered_at) VALUES (?, ?, ?, ?)
+ON CONFLICT (url) DO UPDATE
+SET fingerprint = excluded.fingerprint, cycle = excluded.cycle, covered_at = excluded.covered_at
+'''
+
+
+def canonical_url(url):
+    """Normalize a link so the same story is keyed the same way however it was linked.
+
+    Lowercases the scheme and host, drops a leading 'www.', the fragment,
+    tracking query parameters and a trailing slash, and sorts what is left
+    of the query.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not TRACKING_PARAM.match(key)))
+    return urlunsplit((parts.scheme.lower() or 'https', host, parts.path.rstrip('/') or '/', query, ''))
+
+
+def simhash(text):
+    """64-bit SimHash of the word shingles of `text`, or None if it has no words."""
+    words = WORD.findall(text.lower())
+    if not words:
+        return None
+    shingles = [' '.join(words[i:i + SIMHASH_SHINGLE]) for i in range(max(len(words) - SIMHASH_SHINGLE + 1, 1))]
+    weights = [0] * 64
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def signed_fingerprint(fingerprint):
+    """Fingerprint as stored in SQLite, whose integers are signed 64-bit."""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def unsigned_fingerprint(stored):
+    """Fingerprint read back from SQLite."""
+    return stored % (1 << 64)
+
+
+def init_seen():
+    """Create the seen-article index: one row per canonical URL an edition covered."""
+    with db.pool.connection() as conn:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS seen_articles (
+            url TEXT PRIMARY KEY,
+            fingerprint INTEGER,
+            cycle TEXT NOT NULL,
+            covered_at REAL NOT NULL
+        )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_covered_at ON seen_articles (covered_at)")
+
+
+class ArticleDeduplicator:
+    """Drop stories that an earlier cycle already covered, or that repeat within one build.
+
+    A build first filters its links by canonical URL, before anything is
+    downloaded, then checks each fetched text's SimHash against earlier
+    cycles and against the stories kept so far in this build (so a wire story
+    carried by two sources appears once). Editions of the current cycle don't
+    count, so rebuilding today's edition sees the same stories again.
+    """
+
+    def __init__(self, cycle, window_hours=SEEN_WINDOW_HOURS):
+        self.cycle = cycle
+        self.since = time.time() - window_hours * 3600
+        self.fingerprints = {}
+        self.skipped = {'seen_url': 0, 'duplicate_url': 0, 'near_duplicate': 0}
+        self._lock = threading.Lock()
+
+    def filter_links(self, sections):
+        """Return `sections` without links covered by an earlier cycle or repeated across sections."""
+        urls = {canonical_url(article['link']) for articles in sections.values() for article in articles}
+        covered = set()
+        if urls:
+            with db.pool.connection() as conn:
+                covered = {url for (url,) in conn.execute(
+                    f"SELECT url FROM seen_articles WHERE url IN ({', '.join('?' * len(urls))}) "
+                    "AND cycle != ? AND covered_at >= ?",
+                    [*urls, self.cycle, self.since]
+                )}
+        kept_urls = set()
+        filtered = {}
+        for name, articles in sections.items():
+            filtered[name] = []
+            for article in articles:
+                url = canonical_url(article['link'])
+                if url in covered:
+                    self.skipped['seen_url'] += 1
+                elif url in kept_urls:
+                    self.skipped['duplicate_url'] += 1
+                else:
+                    kept_urls.add(url)
+                    filtered[name].append(article)
+        return filtered
+
+    def is_duplicate(self, article, article_text):
+        """Return True if the text is a near-duplicate of a covered story or one already kept in this build."""
+        return self.is_near_duplicate(article, simhash(article_text) if article_text else None)
+
+    def is_near_duplicate(self, article, fingerprint):
+        """Like is_duplicate, for an article whose text was fingerprinted earlier."""
+        if fingerprint is None:
+            return False
+        with self._lock:
+            if any(hamming_distance(fingerprint, other) <= SIMHASH_MAX_DISTANCE
+                   for other in self.fingerprints.values()) or self._covered(fingerprint):
+                self.skipped['near_duplicate'] += 1
+                return True
+            self.fingerprints[canonical_url(article['link'])] = fingerprint
+        return False
+
+    def _covered(self, fingerprint):
+        # Only a few days of editions fall inside the window, so a scan is cheap
+        with db.pool.connection() as conn:
+            covered = conn.execute(
+                "SELECT fingerprint FROM seen_articles "
+                "WHERE cycle != ? AND covered_at >= ? AND fingerprint IS NOT NULL",
+                (self.cycle, self.since)
+            ).fetchall()
+        return any(hamming_distance(fingerprint, unsigned_fingerprint(other)) <= SIMHASH_MAX_DISTANCE
+                   for (other,) in covered)
+
+    def record(self, articles):
+        """Mark the articles that went into this cycle's edition as covered."""
+        now = time.time()
+        rows = []
+        for article in articles:
+            url = canonical_url(article['link'])
+            fingerprint = self.fingerprints.get(url)
+            rows.append((url, None if fingerprint is None else signed_fingerprint(fingerprint), self.cycle, now))
+        with db.pool.connection() as conn:
+            conn.executemany(UPSERT_SEEN, rows)
@@ -0,0 +1,35 @@
+from registry import REGISTRY
+
+SECTION_TITLES = {key: section['title'] for key, section in REGISTRY.items()}  # in newsletter order
+
+# Labels offered by the Streamlit frontend, plus the section keys and titles themselves
+PREFERENCE_SECTIONS = {
+    label.lower(): key
+    for key, section in REGISTRY.items()
+    for label in [key, section['title'], *section.get('labels', [])]
+}
+
+
+def parse_preference(preference):
+    """Turn a stored preference string into the tuple of sections a subscriber gets.
+
+    The frontend stores a comma-separated list of labels. Subscribers without a
+    recognised preference (including everyone who signed up before preferences
+    existed) receive every section.
+    """
+    wanted = {PREFERENCE_SECTIONS.get(label.strip().lower()) for label in (preference or '').split(',')}
+    sections = tuple(key for key in SECTION_TITLES if key in wanted)
+    return sections or tuple(SECTION_TITLES)
+
+
+def group_by_segment(preferences):
+    """Group stored preference strings into {sections: [preference strings]}."""
+    segments = {}
+    for preference in preferences:
+        segments.setdefault(parse_preference(preference), []).append(preference)
+    return segments
+
+
+def segment_titles(sections):
+    """Human-readable title for a segment, e.g. 'Finance & Tech'."""
+    return ' & '.join(SECTION_TITLES[key] for key in sections)
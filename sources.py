@@ -0,0 +1,266 @@
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+from xml.etree.ElementTree import XMLPullParser
+
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from browser_pool import driver_pool
+from http_client import get_text, iter_text
+from registry import REGISTRY
+
+# Upper bound on sources fetched at once across all sections
+SOURCES_MAX_WORKERS = int(os.getenv('SOURCES_MAX_WORKERS', '16'))
+
+# Runs in the page: every element matching arguments[0] as {title, href, position,
+# visible, dek}, where the dek is the first teaser/description text in the
+# headline's card (up to three levels up, stopping at the first ancestor that
+# also holds another headline) that isn't part of the headline itself
+EXTRACT_ANCHORS_SCRIPT = """
+const DEK = 'p, [class*="dek" i], [class*="description" i], [class*="summary" i], [class*="teaser" i]';
+const selector = arguments[0];
+return Array.from(document.querySelectorAll(selector)).map((element, position) => {
+  const anchor = element.closest('a') || element.querySelector('a');
+  const rect = element.getBoundingClientRect();
+  let dek = '';
+  for (let node = element.parentElement, depth = 0; node && depth < 3 && !dek; node = node.parentElement, depth++) {
+    if (node.querySelectorAll(selector).length > 1) break;
+    for (const candidate of node.querySelectorAll(DEK)) {
+      if (!candidate.contains(element) && !element.contains(candidate) && candidate.innerText.trim()) {
+        dek = candidate.innerText.trim();
+        break;
+      }
+    }
+  }
+  return {
+    title: (element.innerText || '').trim(),
+    href: anchor ? anchor.href : null,
+    position: position,
+    visible: rect.width > 0 && rect.height > 0,
+    dek: dek,
+  };
+});
+"""
+
+# The same teaser/description lookup for server-rendered listings
+DEK_SELECTOR = 'p, [class*="dek" i], [class*="description" i], [class*="summary" i], [class*="teaser" i]'
+
+# How often each source had to fall back to a real browser, for this process
+fallback_counts = Counter()
+_fallback_lock = threading.Lock()
+
+
+class Source:
+    """A place to collect up to `limit` headlines from."""
+
+    # Whether fetch_links may retry the source in a browser when plain HTTP finds nothing
+    browser_fallback = False
+
+    def __init__(self, name, url, limit=5, link_filter=None, fallback=False):
+        self.name = name
+        self.url = url
+        self.limit = limit
+        self.link_filter = link_filter
+        # Only fetched when the section's other sources come back short
+        self.fallback = fallback
+
+    def select_links(self, candidates):
+        """Keep the first `limit` usable, distinct (title, link, dek) candidates.
+
+        The dek (the teaser line shown under a headline) is optional and kept
+        on the link when present.
+        """
+        links = []
+        seen = set()
+        for title, link, dek in candidates:
+            if not title or not link or link.endswith('#comments') or link in seen:
+                continue
+            if self.link_filter and not self.link_filter(link):
+                continue
+            seen.add(link)
+            links.append({'title': title, 'link': link, 'dek': dek} if dek else {'title': title, 'link': link})
+            if len(links) >= self.limit:
+                break
+        return links
+
+
+class ListingSource(Source):
+    """A news listing page whose headline anchors are matched by a CSS selector."""
+
+    browser_fallback = True
+
+    def __init__(self, name, url, selector, limit=5, link_filter=None, fallback=False):
+        super().__init__(name, url, limit, link_filter, fallback)
+        self.selector = selector
+
+    def fetch_static(self):
+        """Match the selector against the server-rendered HTML, without a browser."""
+        soup = BeautifulSoup(get_text(self.url), 'html.parser')
+        return self.select_links(
+            (anchor.get_text(' ', strip=True), urljoin(self.url, anchor.get('href', '')),
+             _static_dek(anchor, self.selector))
+            for anchor in soup.select(self.selector)
+        )
+
+    def fetch_browser(self, driver):
+        """Render the listing page in a browser and match the selector there."""
+        driver.get(self.url)
+        WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located(
+            (By.CSS_SELECTOR, self.selector)
+        ))
+        # The headlines are in the DOM; don't wait for the rest of the page's resources
+        driver.execute_script('window.stop();')
+        # One script call returns every match, instead of a round trip per element and attribute
+        anchors = driver.execute_script(EXTRACT_ANCHORS_SCRIPT, self.selector)
+        return self.select_links(
+            (anchor['title'], anchor['href'], anchor['dek'])
+            for anchor in anchors if anchor['visible']
+        )
+
+
+def _static_dek(element, selector):
+    """The first teaser text in the headline's card, like EXTRACT_ANCHORS_SCRIPT finds in a browser."""
+    for node in list(element.parents)[:3]:
+        # Past the card: this ancestor also holds another headline, whose dek this would pick up
+        if len(node.select(selector, limit=2)) > 1:
+            break
+        for candidate in node.select(DEK_SELECTOR):
+            if candidate is element or element in candidate.parents or candidate in element.parents:
+                continue
+            text = candidate.get_text(' ', strip=True)
+            if text:
+                return text
+    return None
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+class FeedSource(Source):
+    """An RSS or Atom feed, read with a streaming XML parser."""
+
+    def _entry(self, element):
+        title = link = dek = None
+        for child in element:
+            name = _local_name(child.tag)
+            if name == 'title':
+                title = (child.text or '').strip()
+            elif name in ('description', 'summary') and child.text:
+                # Feeds often carry the teaser as escaped HTML
+                dek = BeautifulSoup(child.text, 'html.parser').get_text(' ', strip=True)
+            elif name == 'link':
+                # RSS puts the URL in the text, Atom in href (rel="alternate" or no rel)
+                if child.get('href') and child.get('rel', 'alternate') == 'alternate':
+                    link = child.get('href')
+                elif child.text and child.text.strip():
+                    link = child.text.strip()
+        return title, link and urljoin(self.url, link), dek
+
+    def fetch_static(self):
+        """Stream the feed and stop reading once enough usable entries have been parsed."""
+        parser = XMLPullParser(events=('end',))
+        candidates = []
+        chunks = iter_text(self.url)
+        try:
+            for chunk in chunks:
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    if _local_name(element.tag) in ('item', 'entry'):
+                        candidates.append(self._entry(element))
+                        element.clear()
+                if len(self.select_links(candidates)) >= self.limit:
+                    break
+        finally:
+            chunks.close()
+        return self.select_links(candidates)
+
+
+def fetch_links(source):
+    """Collect a source's headlines, using a pooled browser only if plain HTTP finds none.
+
+    Feeds never fall back to a browser.
+    """
+    try:
+        print(f"Fetching {source.name} over HTTP...")
+        links = source.fetch_static()
+        if links:
+            print(f"Found {len(links)} {source.name} articles without a browser.")
+            return links
+        if not source.browser_fallback:
+            print(f"No {source.name} articles found.")
+            return links
+        print(f"No {source.name} articles in the static HTML, falling back to a browser.")
+    except Exception as e:
+        if not source.browser_fallback:
+            print(f"Error fetching {source.name}: {e}")
+            return []
+        print(f"Error fetching {source.name} listing over HTTP, falling back to a browser: {e}")
+
+    with _fallback_lock:
+        fallback_counts[source.name] += 1
+    try:
+        with driver_pool.lease() as driver:
+            links = source.fetch_browser(driver)
+        print(f"Found {len(links)} {source.name} articles with a browser.")
+        return links
+    except Exception as e:
+        print(f"Error scraping {source.name}: {e}")
+        return []
+
+
+def fallback_stats():
+    """Return how many times each source needed the browser fallback."""
+    with _fallback_lock:
+        return dict(fallback_counts)
+
+
+def build_source(spec):
+    """Create a source from its registry entry."""
+    domain = spec.get('domain')
+    link_filter = (lambda link: urlparse(link).netloc.lower().endswith(domain)) if domain else None
+    fallback = spec.get('fallback', False)
+    if 'feed' in spec:
+        return FeedSource(spec['name'], spec['feed'], spec.get('limit', 5), link_filter, fallback)
+    return ListingSource(spec['name'], spec['listing'], spec['selector'], spec.get('limit', 5), link_filter,
+                         fallback)
+
+
+SECTION_SOURCES = {key: [build_source(spec) for spec in section['sources']] for key, section in REGISTRY.items()}
+
+
+def section_limit(key):
+    """Most articles a section takes: the limits of its non-fallback sources added up."""
+    sources = SECTION_SOURCES[key]
+    return sum(source.limit for source in sources if not source.fallback) or sum(source.limit for source in sources)
+
+
+def _fetch_sources(jobs, links):
+    if not jobs:
+        return
+    with ThreadPoolExecutor(max_workers=min(SOURCES_MAX_WORKERS, len(jobs))) as executor:
+        results = executor.map(fetch_links, [source for _, source in jobs])
+        for (key, _), source_links in zip(jobs, results):
+            seen = {article['link'] for article in links[key]}
+            links[key].extend(article for article in source_links if article['link'] not in seen)
+
+
+def fetch_sections(sections):
+    """Collect the headlines of every source of the given sections at once.
+
+    Returns {section: [{'title', 'link', optional 'dek'}]}, each section holding its sources'
+    links in registry order without repeats. Wall-clock time is that of the
+    slowest source rather than the sum over sections. Fallback sources are
+    fetched afterwards, and only for sections that came back short.
+    """
+    links = {key: [] for key in sections}
+    _fetch_sources([(key, source) for key in sections for source in SECTION_SOURCES[key]
+                    if not source.fallback], links)
+    _fetch_sources([(key, source) for key in sections for source in SECTION_SOURCES[key]
+                    if source.fallback and len(links[key]) < section_limit(key)], links)
+    return links
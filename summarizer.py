@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+from extract import estimate_tokens
+from http_client import openai_http_client
+from summary_cache import SummaryCache, cache_key
+
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_SYSTEM_PROMPT = "You are a helpful assistant that summarizes news articles concisely in 2-3 sentences."
+SUMMARY_USER_PROMPT = "Summarize this article in 2-3 sentences:\n\n"
+SUMMARY_MAX_TOKENS = 150
+
+# Batch mode packs several articles into one chat completion with a JSON response
+SUMMARY_BATCH = os.getenv('SUMMARY_BATCH', '1').lower() in ('1', 'true', 'yes')
+SUMMARY_BATCH_TOKENS = int(os.getenv('SUMMARY_BATCH_TOKENS', '8000'))  # input token budget per request
+SUMMARY_BATCH_MAX_ARTICLES = int(os.getenv('SUMMARY_BATCH_MAX_ARTICLES', '10'))
+SUMMARY_BATCH_SYSTEM_PROMPT = (
+    SUMMARY_SYSTEM_PROMPT
+    + " You will receive several articles, each starting with a line 'ARTICLE <id>'."
+    " Reply with a JSON object whose keys are the article ids and whose values are the 2-3 sentence summaries."
+)
+
+# Returned when the model request fails; unlike the other placeholders it is worth retrying later
+SUMMARY_API_ERROR = "Summary not available due to API error."
+
+summary_cache = SummaryCache()
+
+# Keep connections to the OpenAI API alive across summaries (SDK 1.x uses httpx)
+if hasattr(openai, 'http_client'):
+    openai.http_client = openai_http_client()
+
+batch_stats = {'articles': 0, 'requests': 0, 'round_trips_saved': 0, 'prompt_tokens_saved': 0, 'fallbacks': 0}
+_stats_lock = threading.Lock()
+
+
+def _record(**counts):
+    with _stats_lock:
+        for name, value in counts.items():
+            batch_stats[name] += value
+
+
+def summarize_with_gpt4o_mini(article_text):
+    """Use GPT-4o Mini to generate a concise summary of an article."""
+    if not article_text or len(article_text) < 50:
+        return "Summary not available due to insufficient content."
+
+    try:
+        # Identical article text summarized with the same model and prompt is served from disk
+        key = cache_key(article_text, SUMMARY_MODEL, SUMMARY_SYSTEM_PROMPT + SUMMARY_USER_PROMPT)
+        cached_summary = summary_cache.get(key)
+    except Exception as e:
+        print(f"Error reading the summary cache: {e}")
+        return SUMMARY_API_ERROR
+    if cached_summary is not None:
+        return cached_summary
+    return _request_summary(article_text, key)
+
+
+def _request_summary(article_text, key):
+    """Summarize text already known to miss the cache, and cache the summary under `key`."""
+    try:
+        response = openai.chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": f"{SUMMARY_USER_PROMPT}{article_text}"}
+            ],
+            max_tokens=SUMMARY_MAX_TOKENS
+        )
+
+        summary = response.choices[0].message.content.strip()
+        summary_cache.put(key, summary)
+        return summary
+    except Exception as e:
+        print(f"Error using GPT-4o Mini for summarization: {e}")
+        return SUMMARY_API_ERROR
+
+
+def placeholder_summary(article_text):
+    """The summary to show for text that can't be sent to the model, or None if it can."""
+    if article_text is None:
+        return "Summary not available due to technical error."
+    if not article_text:
+        return "Summary not available - couldn't extract article content."
+    if len(article_text) < 50:
+        return "Summary not available due to insufficient content."
+    return None
+
+
+def summarize_article_text(article_text):
+    """Summarize fetched article text, returning a placeholder if the fetch failed."""
+    placeholder = placeholder_summary(article_text)
+    if placeholder is not None:
+        return placeholder
+
+    # Use GPT-4o Mini to summarize
+    return summarize_with_gpt4o_mini(article_text)
+
+
+def pack_batches(texts, token_budget=SUMMARY_BATCH_TOKENS, max_articles=SUMMARY_BATCH_MAX_ARTICLES):
+    """Greedily group (id, text) pairs into batches that fit the token budget."""
+    batches = []
+    batch = []
+    used = estimate_tokens(SUMMARY_BATCH_SYSTEM_PROMPT)
+    for article_id, text in texts:
+        cost = estimate_tokens(text) + 8
+        if batch and (used + cost > token_budget or len(batch) >= max_articles):
+            batches.append(batch)
+            batch = []
+            used = estimate_tokens(SUMMARY_BATCH_SYSTEM_PROMPT)
+        batch.append((article_id, text))
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def summarize_batch(batch):
+    """Summarize several (id, text) pairs in one request; returns {id: summary} for the ids the model answered."""
+    content = '\n\n'.join(f"ARTICLE {article_id}\n{text}" for article_id, text in batch)
+    response = openai.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": content}
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=SUMMARY_MAX_TOKENS * len(batch)
+    )
+    summaries = json.loads(response.choices[0].message.content)
+    if isinstance(summaries.get('summaries'), dict):
+        summaries = summaries['summaries']
+    wanted = {str(article_id) for article_id, _ in batch}
+    return {key: value.strip() for key, value in summaries.items()
+            if key in wanted and isinstance(value, str) and value.strip()}
+
+
+def summarize_texts(texts):
+    """Summarize a list of article texts, packing cache misses into batched requests.
+
+    Returns the summaries in the same order. Articles the batch reply misses or
+    garbles, or whole batches that fail, fall back to one request per article.
+    """
+    summaries = [placeholder_summary(text) for text in texts]
+    keys = {}
+    misses = []
+    for index, text in enumerate(texts):
+        if summaries[index] is not None:
+            continue
+        keys[index] = cache_key(text, SUMMARY_MODEL, SUMMARY_SYSTEM_PROMPT + SUMMARY_USER_PROMPT)
+        summaries[index] = summary_cache.get(keys[index])
+        if summaries[index] is None:
+            misses.append((index, text))
+
+    if not misses:
+        return summaries
+    if not SUMMARY_BATCH or len(misses) == 1:
+        for index, text in misses:
+            summaries[index] = _request_summary(text, keys[index])
+        return summaries
+
+    def run(batch):
+        try:
+            answered = summarize_batch(batch)
+        except Exception as e:
+            print(f"Error in batched summarization, falling back to per-article requests: {e}")
+            answered = {}
+        for index, text in batch:
+            summary = answered.get(str(index))
+            if summary is None:
+                _record(fallbacks=1)
+                summary = _request_summary(text, keys[index])
+            else:
+                summary_cache.put(keys[index], summary)
+            summaries[index] = summary
+        answered_count = len(answered)
+        if answered_count:
+            # Every answered article saved a round trip and a copy of the per-article prompt
+            single_prompt = estimate_tokens(SUMMARY_SYSTEM_PROMPT) + estimate_tokens(SUMMARY_USER_PROMPT)
+            _record(round_trips_saved=answered_count - 1,
+                    prompt_tokens_saved=answered_count * single_prompt - estimate_tokens(SUMMARY_BATCH_SYSTEM_PROMPT))
+
+    batches = pack_batches(misses)
+    _record(articles=len(misses), requests=len(batches))
+    with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+        list(executor.map(run, batches))
+    return summaries
+
+
+def get_batch_stats():
+    """Return the batch summarization counters for this process."""
+    with _stats_lock:
+        return dict(batch_stats)
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+
+from db import ConnectionPool
+
+SUMMARY_CACHE_DB = os.getenv('SUMMARY_CACHE_DB', 'summary_cache.db')
+SUMMARY_CACHE_TTL_HOURS = float(os.getenv('SUMMARY_CACHE_TTL_HOURS', '72'))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '5000'))
+
+
+def normalize_text(text):
+    """Normalize article text so whitespace or unicode form changes don't bust the cache."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def cache_key(article_text, model, prompt):
+    """Build a content-addressed key from the normalized text, model and prompt."""
+    digest = hashlib.sha256()
+    for part in (model, prompt, normalize_text(article_text)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Disk-backed summary cache with a TTL and least-recently-used eviction."""
+
+    def __init__(self, path=SUMMARY_CACHE_DB, ttl_hours=SUMMARY_CACHE_TTL_HOURS,
+                 max_entries=SUMMARY_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._pool = ConnectionPool(path)
+        self._init_db()
+
+    def _init_db(self):
+        with self._pool.connection() as conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries (last_used)")
+
+    def _count(self, attr):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def get(self, key):
+        """Return the cached summary for `key`, or None if it is missing or expired."""
+        now = time.time()
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT summary, created_at FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count('misses')
+                return None
+            summary, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                self._count('misses')
+                return None
+            conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (now, key))
+        self._count('hits')
+        return summary
+
+    def put(self, key, summary):
+        """Store a summary and evict the least recently used entries over the size limit."""
+        now = time.time()
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, summary, now, now)
+            )
+            conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl_seconds,))
+            overflow = conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM summaries WHERE key IN "
+                    "(SELECT key FROM summaries ORDER BY last_used LIMIT ?)", (overflow,)
+                )
+                with self._lock:
+                    self.evictions += overflow
+
+    def stats(self):
+        """Return hit/miss/eviction counters for this process."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
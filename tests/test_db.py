@@ -0,0 +1,47 @@
+import os
+import sys
+from concurrent.futures import wait
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    pool = db.ConnectionPool(str(tmp_path / 'subscribers.db'))
+    monkeypatch.setattr(db, 'pool', pool)
+    db.init_db()
+    yield pool
+    pool.close()
+
+
+def test_add_subscribers_reports_duplicates(pool):
+    assert db.add_subscribers([('a@x.com', ''), ('b@x.com', 'Tech News'), ('a@x.com', '')]) == [True, True, False]
+    assert db.add_subscribers([('b@x.com', '')]) == [False]
+
+
+def test_add_subscribers_does_not_report_null_preference_as_duplicate(pool):
+    with pytest.raises(db.sqlite3.IntegrityError):
+        db.add_subscribers([('n@x.com', None)])
+
+
+def test_coalescer_fails_only_the_bad_entry_of_a_batch(pool):
+    coalescer = db.WriteCoalescer(window_ms=200)
+    futures = {
+        'good1@x.com': coalescer.submit('good1@x.com', 'Finance News'),
+        'bad@x.com': coalescer.submit('bad@x.com', ['Tech News']),
+        'good2@x.com': coalescer.submit('good2@x.com', ''),
+        'good1@x.com again': coalescer.submit('good1@x.com', ''),
+    }
+    wait(futures.values(), timeout=10)
+
+    assert futures['good1@x.com'].result() is True
+    assert futures['good2@x.com'].result() is True
+    assert futures['good1@x.com again'].result() is False
+    assert futures['bad@x.com'].exception() is not None
+    with pool.connection() as conn:
+        stored = sorted(row[0] for row in conn.execute(db.SELECT_EMAILS))
+    assert stored == ['good1@x.com', 'good2@x.com']
@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import delivery
+from mailer import BulkMailer, request_refused
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    pool = db.ConnectionPool(str(tmp_path / 'subscribers.db'))
+    monkeypatch.setattr(db, 'pool', pool)
+    db.init_db()
+    delivery.init_deliveries()
+    db.add_subscribers([(f"s{n}@x.com", '') for n in range(5)])
+    yield pool
+    pool.close()
+
+
+def test_claimed_recipients_are_not_handed_to_a_second_job(pool):
+    first = list(delivery.iter_pending_recipients(1, [''], chunk_size=2))
+    assert len(first) == 5
+    assert list(delivery.iter_pending_recipients(1, [''], chunk_size=2)) == []
+
+
+def test_recipients_are_reclaimed_once_their_lease_expires(pool):
+    list(delivery.iter_pending_recipients(1, ['']))
+    delivery.record_results(1, [{'email': 's0@x.com', 'ok': True, 'status': 202, 'error': None}])
+    reclaimed = list(delivery.iter_pending_recipients(1, [''], lease_seconds=-1))
+    assert reclaimed == [f"s{n}@x.com" for n in range(1, 5)]
+
+
+class StubResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.headers = {}
+        self.body = body
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self.body
+
+
+class StubSession:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.requests = 0
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.requests += 1
+        return StubResponse(self.status_code, self.body)
+
+
+def test_refused_request_leaves_recipients_retryable(pool):
+    session = StubSession(401, {'errors': [{'message': 'The provided authorization grant is invalid'}]})
+    mailer = BulkMailer('bad-key', 'news@x.com', batch_size=2, max_workers=1, rate_limit=0, session=session)
+    recipients = delivery.iter_pending_recipients(1, [''], chunk_size=2)
+    results = mailer.send('Daily', '<p>news</p>', recipients)
+    recipients.close()
+    delivery.record_results(1, results)
+
+    assert results and all(request_refused(result) for result in results)
+    assert session.requests == 2  # the batches in flight when the first refusal came back, not the third
+    assert 'rejected' not in delivery.delivery_counts(1)
+    assert list(delivery.iter_pending_recipients(1, [''])) == [f"s{n}@x.com" for n in range(5)]
+
+
+def test_only_recipients_named_by_sendgrid_are_rejected(pool):
+    session = StubSession(400, {'errors': [{'field': 'personalizations.0.to', 'message': 'Invalid email'}]})
+    mailer = BulkMailer('key', 'news@x.com', batch_size=1, max_workers=1, rate_limit=0, session=session)
+    results = mailer.send('Daily', '<p>news</p>', delivery.iter_pending_recipients(1, ['']))
+    delivery.record_results(1, results)
+
+    assert all(result['rejected'] for result in results)
+    assert delivery.delivery_counts(1) == {'rejected': 5}
+    assert list(delivery.iter_pending_recipients(1, [''])) == []
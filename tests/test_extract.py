@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extract
+
+STORY = [
+    "The central bank left interest rates unchanged on Tuesday, citing steady inflation and a cooling labour market.",
+    "Officials said they would watch incoming data closely, and markets now expect a first cut early next year.",
+]
+BACKENDS = ['stream'] + (['lxml'] if extract.etree is not None else [])
+
+
+def paragraphs(texts=STORY):
+    return ''.join(f"<p>{text}</p>" for text in texts)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('wrapper', [
+    "<div class='threads'>{}</div>",
+    "<div class='downloads uploads'>{}</div>",
+    "<div class='headerWrapper'><article>{}</article></div>",
+    "<div id='subheader'><div class='body'>{}</div></div>",
+])
+def test_class_names_containing_boilerplate_words_are_kept(wrapper, backend):
+    html = f"<html><body>{wrapper.format(paragraphs())}</body></html>"
+    assert extract.extract_article_text(html, backend=backend) == ' '.join(STORY)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_boilerplate_tokens_are_skipped(backend):
+    html = (f"<html><body><div class='site-header'><p>{'Sign in to read more of our coverage, ' * 3}</p></div>"
+            f"<article>{paragraphs()}</article><div class='ad'><p>{'Buy now and save big on everything, ' * 3}</p></div>"
+            "</body></html>")
+    assert extract.extract_article_text(html, backend=backend) == ' '.join(STORY)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_falls_back_to_unfiltered_paragraphs(backend):
+    html = f"<html><body><div class='comments'>{paragraphs()}</div></body></html>"
+    assert extract.extract_article_text(html, backend=backend) == ' '.join(STORY)
+
+
+def test_over_budget_paragraph_without_sentence_breaks_is_truncated():
+    html = f"<html><body><article><p>{', '.join(['word'] * 3000)}</p></article></body></html>"
+    text = extract.extract_article_text(html, token_budget=100)
+    assert text.startswith('word, word')
+    assert 0 < extract.estimate_tokens(text) <= 100
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetch_cache import FetchCache
+
+PAGE = b"<html><body><p>The story.</p></body></html>"
+
+
+class StubResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {'ETag': '"v1"', 'Content-Type': 'text/html; charset=utf-8'}
+        self.encoding = 'utf-8'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield PAGE
+
+
+class StubSession:
+    """Answers 304 whenever the request carries the page's ETag."""
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        return StubResponse(304 if (headers or {}).get('If-None-Match') == '"v1"' else 200)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FetchCache(str(tmp_path / 'fetch_cache.db'), http_session=StubSession())
+
+
+def test_unchanged_page_is_served_from_the_cache(cache):
+    extractions = []
+    def extract(chunks):
+        extractions.append(1)
+        return ''.join(chunks)
+    assert cache.fetch_text('https://x.com/a', extract, 'r1') == PAGE.decode()
+    assert cache.fetch_text('https://x.com/a', extract, 'r1') == PAGE.decode()
+    assert len(extractions) == 1
+    assert cache.stats() == {'not_modified': 1, 'modified': 0, 'uncached': 1}
+
+
+def test_text_from_other_extractor_settings_is_extracted_again(cache):
+    cache.fetch_text('https://x.com/a', lambda chunks: 'old budget', 'r1:stream:1200')
+    assert cache.fetch_text('https://x.com/a', lambda chunks: 'new budget', 'r1:stream:600') == 'new budget'
+    assert cache.fetch_text('https://x.com/a', lambda chunks: 'unused', 'r1:stream:600') == 'new budget'
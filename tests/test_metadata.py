@@ -0,0 +1,26 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metadata
+
+
+def test_json_ld_skips_oddly_shaped_graphs():
+    blocks = [
+        json.dumps({'@type': 'WebPage', '@graph': {'name': 'site'}}),
+        '{not json',
+        json.dumps({'@graph': ['breadcrumbs', {'@type': 'NewsArticle', 'description': 'The story.'}]}),
+    ]
+    assert metadata.json_ld_description(blocks) == 'The story.'
+
+
+def test_json_ld_graph_may_be_a_single_object():
+    blocks = [json.dumps({'@graph': {'@type': ['Thing', 'NewsArticle'], 'description': 'The story.'}})]
+    assert metadata.json_ld_description(blocks) == 'The story.'
+
+
+def test_condense_keeps_the_first_sentences_within_the_limit():
+    assert metadata.condense('One. Two! Three? Four.') == 'One. Two! Three?'
+    assert metadata.condense('x' * (metadata.METADATA_MAX_CHARS + 1)) == ''
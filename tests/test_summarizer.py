@@ -0,0 +1,31 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import summarizer
+from summary_cache import SummaryCache
+
+ARTICLE = "Stocks rose on Tuesday after the central bank left interest rates unchanged for a third month."
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = SummaryCache(str(tmp_path / 'summary_cache.db'))
+    monkeypatch.setattr(summarizer, 'summary_cache', cache)
+
+    def create(**kwargs):
+        message = SimpleNamespace(content="Stocks rose as rates held.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+    monkeypatch.setattr(summarizer.openai.chat.completions, 'create', create)
+    return cache
+
+
+def test_each_miss_is_looked_up_once(cache):
+    assert summarizer.summarize_texts([ARTICLE]) == ["Stocks rose as rates held."]
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert summarizer.summarize_texts([ARTICLE]) == ["Stocks rose as rates held."]
+    assert (cache.hits, cache.misses) == (1, 1)